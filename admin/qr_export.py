@@ -0,0 +1,173 @@
+import os
+import zipfile
+import zlib
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+EXPORT_FORMATS = ('pdf', 'zip')
+
+# A4 in points, with a 3 x 4 grid of codes per page
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842
+PAGE_MARGIN = 36
+GRID_COLUMNS, GRID_ROWS = 3, 4
+CELL_PADDING = 8
+
+# Renders waiting to be written, per worker, so memory stays bounded
+RENDER_WINDOW = 4
+
+
+def render_export_item(url, name, fmt):
+    """Render one labeled QR code in a worker process.
+
+    Returns PNG bytes for ZIP exports, or (width, height, deflated RGB
+    pixels) for PDF exports so the parent only has to copy bytes.
+    """
+    # Imported here so only the worker processes load qrcode and PIL
+    from PIL import Image
+    import qr_render
+
+    png, _, _ = qr_render.render_qr(url, name=name, style="label")
+    if fmt == 'zip':
+        return png
+    img = Image.open(BytesIO(png)).convert('RGB')
+    return img.width, img.height, zlib.compress(img.tobytes())
+
+
+def render_all(items, fmt, workers):
+    """Render (url, name) pairs on a process pool, yielding results in order"""
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for url, name in items:
+            pending.append(executor.submit(render_export_item, url, name, fmt))
+            if len(pending) >= workers * RENDER_WINDOW:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+class StreamBuffer:
+    """Write-only file object whose contents are taken out in chunks"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def safe_filename(name):
+    cleaned = ''.join(c if c.isalnum() else '_' for c in name).strip('_')
+    return cleaned or 'instructor'
+
+
+def zip_sheet(instructors, rendered):
+    """Stream a ZIP of <name>_<code>.png files"""
+    buffer = StreamBuffer()
+    # PNGs are already compressed, so they are stored as they are
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for (code, name), png in zip(instructors, rendered):
+            archive.writestr(f"{safe_filename(name)}_{code}.png", png)
+            yield buffer.take()
+    yield buffer.take()
+
+
+def pdf_sheet(instructors, rendered):
+    """Stream a PDF with the codes laid out GRID_COLUMNS x GRID_ROWS per A4 page.
+
+    Objects are written as soon as a page is full; only the page tree,
+    cross-reference table and trailer wait until the end.
+    """
+    offsets = {}
+    position = 0
+    page_ids = []
+    next_id = 3  # 1 is the catalog, 2 the page tree
+
+    def write_object(object_id, body, stream=None):
+        nonlocal position
+        offsets[object_id] = position
+        data = f"{object_id} 0 obj\n".encode() + body
+        if stream is not None:
+            data += b"\nstream\n" + stream + b"\nendstream"
+        data += b"\nendobj\n"
+        position += len(data)
+        return data
+
+    def write_page(images):
+        nonlocal next_id
+        chunks = []
+        drawing = []
+        resources = []
+        cell_width = (PAGE_WIDTH - 2 * PAGE_MARGIN) / GRID_COLUMNS
+        cell_height = (PAGE_HEIGHT - 2 * PAGE_MARGIN) / GRID_ROWS
+
+        for index, (width, height, pixels) in enumerate(images):
+            image_id, next_id = next_id, next_id + 1
+            chunks.append(write_object(image_id, (
+                f"<< /Type /XObject /Subtype /Image /Width {width} /Height {height} "
+                f"/ColorSpace /DeviceRGB /BitsPerComponent 8 /Filter /FlateDecode /Length {len(pixels)} >>"
+            ).encode(), pixels))
+            resources.append(f"/Im{index} {image_id} 0 R")
+
+            # Fit the image inside its cell, keeping its aspect ratio
+            scale = min((cell_width - 2 * CELL_PADDING) / width, (cell_height - 2 * CELL_PADDING) / height)
+            draw_width, draw_height = width * scale, height * scale
+            column, row = index % GRID_COLUMNS, index // GRID_COLUMNS
+            x = PAGE_MARGIN + column * cell_width + (cell_width - draw_width) / 2
+            y = PAGE_HEIGHT - PAGE_MARGIN - (row + 1) * cell_height + (cell_height - draw_height) / 2
+            drawing.append(f"q {draw_width:.2f} 0 0 {draw_height:.2f} {x:.2f} {y:.2f} cm /Im{index} Do Q")
+
+        content = "\n".join(drawing).encode()
+        content_id, page_id, next_id = next_id, next_id + 1, next_id + 2
+        chunks.append(write_object(content_id, f"<< /Length {len(content)} >>".encode(), content))
+        chunks.append(write_object(page_id, (
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {PAGE_WIDTH} {PAGE_HEIGHT}] "
+            f"/Resources << /XObject << {' '.join(resources)} >> >> /Contents {content_id} 0 R >>"
+        ).encode()))
+        page_ids.append(page_id)
+        return b"".join(chunks)
+
+    header = b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"
+    position = len(header)
+    yield header + write_object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+
+    per_page = GRID_COLUMNS * GRID_ROWS
+    page = []
+    for _, image in zip(instructors, rendered):
+        page.append(image)
+        if len(page) == per_page:
+            yield write_page(page)
+            page = []
+    if page or not page_ids:
+        yield write_page(page)
+
+    kids = ' '.join(f"{page_id} 0 R" for page_id in page_ids)
+    tree = write_object(2, f"<< /Type /Pages /Kids [{kids}] /Count {len(page_ids)} >>".encode())
+
+    xref_position = position
+    xref = [f"xref\n0 {next_id}\n", "0000000000 65535 f \n"]
+    xref += [f"{offsets[object_id]:010d} 00000 n \n" for object_id in range(1, next_id)]
+    trailer = f"trailer\n<< /Size {next_id} /Root 1 0 R >>\nstartxref\n{xref_position}\n%%EOF\n"
+    yield tree + "".join(xref).encode() + trailer.encode()
+
+
+def export_qr_codes(instructors, base_url, fmt, workers=None):
+    """Yield a PDF or ZIP of labeled QR codes for (unique_code, name) pairs, chunk by chunk"""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+
+    base_url = base_url.rstrip('/')
+    items = [(f"{base_url}/valentine/instructor/{code}/messages", name) for code, name in instructors]
+    rendered = render_all(items, fmt, workers)
+    sheet = zip_sheet if fmt == 'zip' else pdf_sheet
+    return sheet(instructors, rendered)
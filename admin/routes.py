@@ -1,11 +1,24 @@
 import os
-from flask import Blueprint, render_template, request, redirect, url_for, jsonify, flash
-from models import Instructor, OfficialStudent
-from extensions import db
+import sys
+import click
+from flask import Blueprint, render_template, request, redirect, url_for, jsonify, flash, abort, current_app, stream_with_context
+from models import Instructor, OfficialStudent, StudentMessage, reconcile_message_counters
+from extensions import db, cache
+from student.passwords import get_password_hasher, get_login_throttle
+from profiling import get_profiler
+from search import search_messages, search_result_json
+from moderation import get_moderator, rescan_messages, RESCAN_CHUNK_SIZE
+from analytics import analytics_report, catch_up_rollups, parse_hour
+from archive import archive_messages, ArchiveConflict, VACUUM_MODES
+from admin.student_import import iter_rows, import_students, IMPORT_CHUNK_SIZE
+from admin.qr_export import export_qr_codes, EXPORT_FORMATS
+from message_export import export_messages, export_filename, parse_date_filter, EXPORT_CHUNK_SIZE as MESSAGE_CHUNK_SIZE, \
+    EXPORT_FORMATS as MESSAGE_FORMATS, EXPORT_MIMETYPES as MESSAGE_MIMETYPES
+from sqlalchemy import or_
+from sqlalchemy.orm import joinedload, undefer
 import random
+import re
 import string
-import qrcode
-from io import BytesIO
 import base64
 from datetime import datetime
 
@@ -20,39 +33,263 @@ admin_bp = Blueprint('admin', __name__,
 def generate_code():
     return ''.join(random.choices(string.ascii_uppercase + string.digits, k=8))
 
-# Helper to generate QR code as base64
+# Helper to generate QR code as PNG bytes
 def generate_qr_code(data):
+    # qrcode and PIL are only loaded once a code is drawn
+    import qr_render
     try:
-        # Create QR code instance
-        qr = qrcode.QRCode(
-            version=1,
-            box_size=10,
-            border=5,
-            error_correction=qrcode.constants.ERROR_CORRECT_L
-        )
-        
-        # Add data
-        qr.add_data(data)
-        qr.make(fit=True)
-        
-        # Create image
-        img = qr.make_image(fill_color="black", back_color="white")
-        
-        # Convert to base64
-        buffered = BytesIO()
-        img.save(buffered, format="PNG")
-        img_str = base64.b64encode(buffered.getvalue()).decode()
-        
-        return img_str
+        png, _, _ = qr_render.render_qr(data)
+        return png
     except Exception as e:
         print(f"Error generating QR code: {e}")
         return None
 
+
+@admin_bp.record_once
+def warm_qr_renderer(state):
+    """Pre-load the QR font and tables when the admin blueprint is registered (QR_WARM_ON_START)"""
+    if state.app.config['QR_WARM_ON_START']:
+        import qr_render
+        qr_render.warm()
+
+
+# Roster pages are fetched by the dashboard on demand
+ROSTER_PAGE_SIZE = 50
+ROSTER_MAX_PAGE_SIZE = 200
+
+# Held messages shown per page of the moderation review list
+HELD_PAGE_SIZE = 50
+
+
+def escape_like(value):
+    """Escape LIKE wildcards so user input only matches literally"""
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def search_roster(query, search):
+    """Case-insensitive prefix match on student ID or last name"""
+    if not search:
+        return query
+    pattern = escape_like(search) + '%'
+    return query.filter(or_(
+        OfficialStudent.student_id.like(pattern, escape='\\'),
+        OfficialStudent.last_name.like(pattern, escape='\\')
+    ))
+
+
+def roster_page(search='', after=0, limit=ROSTER_PAGE_SIZE):
+    """Return one page of official students (by id) and the cursor for the next page"""
+    query = search_roster(OfficialStudent.query, search)
+    
+    if search:
+        # "id + 0" stops SQLite from walking the primary key here, so it uses the
+        # NOCASE prefix indexes and only sorts the (few) matching rows
+        query = query.filter(OfficialStudent.id + 0 > after)
+    else:
+        query = query.filter(OfficialStudent.id > after)
+    
+    rows = query.order_by(OfficialStudent.id).limit(limit + 1).all()
+    next_cursor = rows[limit - 1].id if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+def roster_count(search=''):
+    query = db.session.query(db.func.count(OfficialStudent.id))
+    return search_roster(query, search).scalar()
+
+
 @admin_bp.route("/")
 def dashboard():
     instructors = Instructor.query.all()
-    students = OfficialStudent.query.all()
-    return render_template("dashboard.html", instructors=instructors, students=students)
+    student_count = roster_count()
+    return render_template("dashboard.html", instructors=instructors, student_count=student_count)
+
+
+@admin_bp.route("/students")
+def official_students():
+    """Full-page official student roster"""
+    return render_template("official_students.html", student_count=roster_count())
+
+
+@admin_bp.route("/api/students")
+def roster_api():
+    """Paginated official student roster with prefix search on ID / last name"""
+    search = request.args.get('q', '').strip()
+    after = request.args.get('after', 0, type=int)
+    limit = request.args.get('limit', ROSTER_PAGE_SIZE, type=int)
+    limit = max(1, min(limit, ROSTER_MAX_PAGE_SIZE))
+    
+    students, next_cursor = roster_page(search, after, limit)
+    
+    result = {
+        'students': [{
+            'id': student.id,
+            'student_id': student.student_id,
+            'first_name': student.first_name,
+            'last_name': student.last_name,
+            'delete_url': url_for('admin.delete_student', student_id=student.id),
+        } for student in students],
+        'next_cursor': next_cursor,
+    }
+    # Only count on the first page; later pages keep the total they already have
+    if not after:
+        result['total'] = roster_count(search)
+    return jsonify(result)
+
+
+@admin_bp.route("/api/messages/search")
+def search_all_messages():
+    """Full-text search across every inbox (optionally one instructor's), ranked"""
+    page = request.args.get('page', 1, type=int)
+    results, has_more = search_messages(
+        request.args.get('q', ''),
+        instructor_id=request.args.get('instructor_id', type=int),
+        page=page
+    )
+    return jsonify({
+        'results': [search_result_json(message, snippet) for message, snippet in results],
+        'next_page': page + 1 if has_more else None
+    })
+
+
+def analytics_filters():
+    """since/until query arguments as rollup hour keys; aborts with 400 if malformed"""
+    try:
+        return parse_hour(request.args.get('since')), parse_hour(request.args.get('until'))
+    except ValueError as e:
+        abort(400, description=str(e))
+
+
+@admin_bp.route("/analytics")
+def analytics():
+    since, until = analytics_filters()
+    return render_template("analytics.html", report=analytics_report(since, until))
+
+
+@admin_bp.route("/api/analytics")
+def analytics_api():
+    """Message volume per instructor, course, year and hour (?since=YYYY-MM-DD[ HH]&until=...)"""
+    since, until = analytics_filters()
+    return jsonify(analytics_report(since, until))
+
+
+@admin_bp.route("/api/moderation", methods=["GET", "POST"])
+def moderation_terms():
+    """The moderation word list; POST {"terms": [...]} replaces it and re-checks saved messages"""
+    moderator = get_moderator()
+    if request.method == "POST":
+        terms = (request.get_json(silent=True) or {}).get('terms')
+        if not isinstance(terms, list) or not all(isinstance(term, str) for term in terms):
+            return jsonify({'error': 'terms must be a list of strings'}), 400
+        moderator.set_terms(terms)
+        scanned, approved, held = rescan_messages(moderator)
+        return jsonify({'terms': moderator.terms, 'scanned': scanned, 'approved': approved, 'held': held})
+    
+    return jsonify({'terms': moderator.terms, 'held_messages': held_count()})
+
+
+def held_count():
+    return db.session.query(db.func.count(StudentMessage.id))\
+        .filter(StudentMessage.is_approved.is_(False)).scalar()
+
+
+def held_page(before=None, limit=HELD_PAGE_SIZE):
+    """One page of messages held by moderation (newest first) and the cursor for the next page"""
+    query = StudentMessage.query\
+        .options(joinedload(StudentMessage.student), joinedload(StudentMessage.instructor))\
+        .filter(StudentMessage.is_approved.is_(False))
+    if before:
+        query = query.filter(StudentMessage.id < before)
+
+    rows = query.order_by(StudentMessage.id.desc()).limit(limit + 1).all()
+    next_cursor = rows[limit - 1].id if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+@admin_bp.route("/moderation")
+def held_messages():
+    """Messages held by moderation, to release to the instructor or delete"""
+    messages, next_cursor = held_page(request.args.get('before', type=int))
+    return render_template("moderation.html", messages=messages, next_cursor=next_cursor,
+                           held_count=held_count(), terms=get_moderator().terms)
+
+
+@admin_bp.route("/api/moderation/held")
+def held_messages_api():
+    """Held messages as JSON, newest first (?before=<id> for the next page)"""
+    messages, next_cursor = held_page(request.args.get('before', type=int))
+    return jsonify({
+        'messages': [{
+            'id': message.id,
+            'instructor_id': message.instructor_id,
+            'instructor_name': message.instructor.name,
+            'student_name': message.student.name,
+            'message': message.message,
+            'created_at': message.created_at.isoformat(),
+            'release_url': url_for('admin.release_message', message_id=message.id),
+        } for message in messages],
+        'next_cursor': next_cursor,
+    })
+
+
+@admin_bp.route("/moderation/<int:message_id>/release", methods=["POST"])
+def release_message(message_id):
+    """Approve a held message so the instructor can read it"""
+    message = StudentMessage.query.get_or_404(message_id)
+    # The update hook moves it into the approved counters
+    message.is_approved = True
+    message.is_reviewed = True
+    db.session.commit()
+    if request.is_json:
+        return jsonify({'success': True, 'id': message.id})
+    flash('Message released to the instructor.', 'success')
+    return redirect(url_for('admin.held_messages'))
+
+
+@admin_bp.route("/moderation/<int:message_id>/delete", methods=["POST"])
+def delete_held_message(message_id):
+    """Delete a held message"""
+    message = StudentMessage.query.get_or_404(message_id)
+    if message.is_approved:
+        abort(400, description="Only held messages can be deleted here")
+    db.session.delete(message)
+    db.session.commit()
+    if request.is_json:
+        return jsonify({'success': True, 'id': message_id})
+    flash('Message deleted.', 'success')
+    return redirect(url_for('admin.held_messages'))
+
+
+@admin_bp.route("/metrics/passwords")
+def password_metrics():
+    """Password hashing latency/concurrency and login throttling counters"""
+    return jsonify({
+        'hashing': get_password_hasher().metrics(),
+        'login_throttle': get_login_throttle().metrics()
+    })
+
+
+@admin_bp.route("/metrics/qr")
+def qr_metrics():
+    """Hit/miss counters of this worker's rendered QR cache"""
+    # Reported as not loaded rather than importing qrcode and PIL just to say so
+    qr_render = sys.modules.get('qr_render')
+    if qr_render is None:
+        return jsonify({'loaded': False})
+    return jsonify({'loaded': True, 'cache': qr_render.cache_stats()})
+
+
+@admin_bp.route("/metrics/requests")
+def request_metrics():
+    """Per-endpoint latency percentiles and SQL counts (needs PROFILING_ENABLED)"""
+    profiler = get_profiler()
+    if profiler is None:
+        return jsonify({'enabled': False}), 404
+    return jsonify({
+        'enabled': True,
+        'query_budget': profiler.query_budget,
+        'endpoints': profiler.summary()
+    })
 
 
 @admin_bp.route("/add", methods=["GET", "POST"])
@@ -75,12 +312,16 @@ def add_instructor():
             message=None,
             background_color=color,
             unique_code=unique_code,
-            qr_code=qr_code_data,
             is_message_added=False
         )
+        if qr_code_data:
+            new_instructor.set_qr_image(qr_code_data)
 
         db.session.add(new_instructor)
         db.session.commit()
+        
+        # Students' cached instructor grid is now out of date
+        cache.bump_version('instructors')
 
         return redirect(url_for("admin.instructor_success", instructor_id=new_instructor.id))
 
@@ -96,10 +337,9 @@ def instructor_success(instructor_id):
     
     return render_template("instructor_success.html", instructor=instructor, instructor_url=instructor_url)
 
-from PIL import Image, ImageDraw, ImageFont
-import io
-import base64
-import qrcode
+# Preview codes are throwaway, but reusing one keeps the URL stable so
+# repeat previews for the same name come from the render cache
+PREVIEW_CODE_PATTERN = re.compile(r"^[A-Z0-9]{8}$")
 
 @admin_bp.route("/generate-qr-preview", methods=["POST"])
 def generate_qr_preview():
@@ -114,93 +354,29 @@ def generate_qr_preview():
             
         name = data.get('name', 'Instructor')
         
-        # Generate temporary preview code
-        temp_code = generate_code()
+        # Reuse the previous preview code if the form sent one back
+        temp_code = data.get('temp_code') or ''
+        if not PREVIEW_CODE_PATTERN.match(temp_code):
+            temp_code = generate_code()
         
         # FIX: Add /instructor/ to match blueprint prefix
         preview_url = f"{request.host_url}valentine/instructor/{temp_code}/messages"
-        print(f"Preview URL: {preview_url}")
         
-        # Generate QR code with error correction high (to allow overlay)
-        qr = qrcode.QRCode(
-            version=1, 
-            box_size=10, 
-            border=2,
-            error_correction=qrcode.constants.ERROR_CORRECT_H  # High error correction
-        )
-        qr.add_data(preview_url)
-        qr.make(fit=True)
-        
-        # Create QR code image
-        qr_img = qr.make_image(fill_color="black", back_color="white")
-        
-        # Convert to PIL Image for editing
-        qr_img = qr_img.convert('RGB')
-        
-        # Create a copy to work with
-        img = qr_img.copy()
-        draw = ImageDraw.Draw(img)
-        
-        # Try to use a font, fallback to default
-        try:
-            # You may need to adjust the font path
-            font = ImageFont.truetype("arial.ttf", 20)
-        except:
-            font = ImageFont.load_default()
-        
-        # Calculate text position (center)
-        img_width, img_height = img.size
-        center_x = img_width // 2
-        center_y = img_height // 2
-        
-        # Get text size
-        try:
-            # PIL 10+
-            bbox = draw.textbbox((0, 0), name, font=font)
-            text_width = bbox[2] - bbox[0]
-            text_height = bbox[3] - bbox[1]
-        except:
-            # Older PIL
-            text_width, text_height = font.getsize(name)
-        
-        # Create a white background for text (to make it readable over QR)
-        padding = 8
-        overlay_x1 = center_x - (text_width // 2) - padding
-        overlay_y1 = center_y - (text_height // 2) - padding
-        overlay_x2 = center_x + (text_width // 2) + padding
-        overlay_y2 = center_y + (text_height // 2) + padding
-        
-        # Draw white rectangle behind text
-        draw.rectangle(
-            [overlay_x1, overlay_y1, overlay_x2, overlay_y2],
-            fill='white'
-        )
-        
-        # Draw border around rectangle
-        draw.rectangle(
-            [overlay_x1, overlay_y1, overlay_x2, overlay_y2],
-            outline='#ff4d6d',
-            width=2
-        )
-        
-        # Draw text
-        text_x = center_x - (text_width // 2)
-        text_y = center_y - (text_height // 2)
-        
-        # Draw text in Valentine pink
-        draw.text((text_x, text_y), name, fill='#ff4d6d', font=font)
+        # High error correction QR with the name drawn in the middle
+        import qr_render
+        png, render_ms, cache_hit = qr_render.render_qr(preview_url, name=name, style="overlay")
+        current_app.logger.debug(f"QR preview {'hit' if cache_hit else 'miss'} in {render_ms:.1f}ms")
         
-        # Convert to base64
-        buffered = BytesIO()
-        img.save(buffered, format="PNG")
-        img_str = base64.b64encode(buffered.getvalue()).decode()
-        
-        return jsonify({
+        response = jsonify({
             'success': True,
-            'qr_code': img_str,
+            'qr_code': base64.b64encode(png).decode(),
             'preview_url': preview_url,
-            'temp_code': temp_code
+            'temp_code': temp_code,
+            'render_ms': round(render_ms, 2),
+            'cache_hit': cache_hit
         })
+        response.headers['Server-Timing'] = f'qr;dur={render_ms:.2f};desc="{"hit" if cache_hit else "miss"}"'
+        return response
         
     except Exception as e:
         print(f"Error in generate_qr_preview: {str(e)}")
@@ -210,12 +386,59 @@ def generate_qr_preview():
         }), 500
     
 
+def export_instructors():
+    """(unique_code, name) for every instructor, in name order"""
+    return db.session.query(Instructor.unique_code, Instructor.name).order_by(Instructor.name, Instructor.id).all()
+
+
+@admin_bp.route("/qr-codes.<fmt>")
+def export_qr_sheet(fmt):
+    """Download every instructor's QR code as a printable PDF or a ZIP of PNGs"""
+    if fmt not in EXPORT_FORMATS:
+        abort(404)
+    
+    # Read the list up front; the render workers never touch the database
+    instructors = export_instructors()
+    chunks = export_qr_codes(instructors, request.host_url, fmt, current_app.config['QR_EXPORT_WORKERS'])
+    
+    response = current_app.response_class(stream_with_context(chunks),
+                                          mimetype='application/pdf' if fmt == 'pdf' else 'application/zip')
+    response.headers['Content-Disposition'] = f'attachment; filename="valentine-qr-codes.{fmt}"'
+    return response
+
+
+@admin_bp.route("/messages.<fmt>")
+def export_all_messages(fmt):
+    """Download every message (or one instructor's, ?instructor=CODE) as CSV or JSONL"""
+    if fmt not in MESSAGE_FORMATS:
+        abort(404)
+    
+    code = request.args.get('instructor')
+    instructor_id = None
+    if code:
+        instructor_id = db.session.query(Instructor.id).filter_by(unique_code=code).scalar()
+        if instructor_id is None:
+            abort(404)
+    try:
+        since = parse_date_filter(request.args.get('since'))
+        until = parse_date_filter(request.args.get('until'), end=True)
+    except ValueError:
+        abort(400, description="since and until must be ISO dates, e.g. 2026-02-14")
+    
+    chunks = export_messages(fmt, instructor_id=instructor_id, since=since, until=until)
+    response = current_app.response_class(stream_with_context(chunks),
+                                          mimetype=MESSAGE_MIMETYPES[fmt])
+    response.headers['Content-Disposition'] = f'attachment; filename="{export_filename(fmt, code)}"'
+    return response
+
+
 @admin_bp.route("/instructor/<int:instructor_id>/delete", methods=["POST"])
 def delete_instructor(instructor_id):
     """Delete an instructor"""
     instructor = Instructor.query.get_or_404(instructor_id)
     db.session.delete(instructor)
     db.session.commit()
+    cache.bump_version('instructors')
     flash('Instructor deleted successfully!', 'success')
     return redirect(url_for("admin.dashboard"))
 
@@ -252,6 +475,21 @@ def add_student():
     return redirect(url_for('admin.dashboard'))
 
 
+@admin_bp.route("/import-students", methods=["POST"])
+def import_students_file():
+    """Bulk import official students from an uploaded CSV/XLSX roster"""
+    upload = request.files.get('file')
+    if not upload or not upload.filename:
+        return jsonify({'success': False, 'error': 'No file uploaded'}), 400
+    
+    try:
+        report = import_students(iter_rows(upload.stream, upload.filename))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    return jsonify({'success': True, **report})
+
+
 @admin_bp.route("/delete-student/<int:student_id>", methods=["POST"])
 def delete_student(student_id):
     """Delete an official student"""
@@ -262,4 +500,139 @@ def delete_student(student_id):
     db.session.commit()
     
     flash(f'Student {name} deleted successfully!', 'success')
-    return redirect(url_for('admin.dashboard'))
\ No newline at end of file
+    return redirect(url_for('admin.dashboard'))
+
+
+@admin_bp.cli.command("migrate-qr-codes")
+def migrate_qr_codes():
+    """Move legacy base64 QR codes from instructors.qr_code into instructor_qr_codes"""
+    instructors = Instructor.query\
+        .options(undefer(Instructor.qr_code))\
+        .filter(Instructor.qr_code.isnot(None))\
+        .all()
+    
+    for instructor in instructors:
+        instructor.set_qr_image(base64.b64decode(instructor.qr_code))
+        instructor.qr_code = None
+    
+    db.session.commit()
+    click.echo(f"Migrated {len(instructors)} QR code(s)")
+
+
+@admin_bp.cli.command("reconcile-counters")
+def reconcile_counters():
+    """Rebuild the per-instructor and per-student message counters"""
+    reconcile_message_counters()
+    click.echo("Message counters rebuilt")
+
+
+@admin_bp.cli.command("rescan-messages")
+@click.option("--chunk-size", default=RESCAN_CHUNK_SIZE, show_default=True, help="Messages read per round trip")
+def rescan_messages_command(chunk_size):
+    """Re-check every saved message against the moderation word list"""
+    scanned, approved, held = rescan_messages(get_moderator(), chunk_size=chunk_size)
+    click.echo(f"Scanned {scanned} message(s): {held} newly held, {approved} newly approved")
+
+
+@admin_bp.cli.command("catch-up-rollups")
+@click.option("--hours", type=int, help="Recent hours to recount (default: ANALYTICS_CATCHUP_HOURS)")
+@click.option("--all", "recount_all", is_flag=True, help="Recount every hour")
+def catch_up_rollups_command(hours, recount_all):
+    """Recount the analytics rollups from the messages themselves"""
+    if hours is None:
+        hours = current_app.config['ANALYTICS_CATCHUP_HOURS']
+    since = catch_up_rollups(None if recount_all else hours)
+    click.echo(f"Rollups recounted since {since:%Y-%m-%d %H}:00" if since else "All rollups recounted")
+
+
+@admin_bp.cli.command("archive-messages")
+@click.option("--before", "cutoff", required=True, type=click.DateTime(formats=["%Y-%m-%d", "%Y-%m-%d %H:%M"]),
+              help="Archive messages sent before this date (Manila time)")
+@click.option("--batch-size", type=int, help="Messages per transaction (default: ARCHIVE_BATCH_SIZE)")
+@click.option("--vacuum", type=click.Choice(VACUUM_MODES), default="incremental", show_default=True,
+              help="How to shrink the live database afterwards")
+def archive_messages_command(cutoff, batch_size, vacuum):
+    """Move past seasons' messages into the archive database"""
+    try:
+        report = archive_messages(
+            cutoff,
+            batch_size or current_app.config['ARCHIVE_BATCH_SIZE'],
+            vacuum=vacuum,
+            progress=lambda moved: click.echo(f"  {moved} moved", err=True)
+        )
+    except ArchiveConflict as e:
+        raise click.ClickException(f"{e}. Earlier batches were archived; run \"flask init-db\" and check "
+                                   f"the conflicting message before archiving again.")
+    click.echo(
+        f"Archived {report['moved']} message(s) in {report['seconds']}s; "
+        f"database {report['size_before'] // 1024} KiB -> {report['size_after'] // 1024} KiB"
+    )
+
+
+@admin_bp.cli.command("import-students")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--chunk-size", default=IMPORT_CHUNK_SIZE, show_default=True, help="Rows per transaction")
+def import_students_command(path, chunk_size):
+    """Bulk import official students from a CSV/XLSX roster"""
+    with open(path, 'rb') as stream:
+        try:
+            report = import_students(iter_rows(stream, path), chunk_size=chunk_size)
+        except ValueError as e:
+            raise click.ClickException(str(e))
+    
+    click.echo(
+        f"{report['rows']} rows: {report['inserted']} inserted, "
+        f"{report['duplicates']} duplicate, {report['invalid']} invalid "
+        f"in {report['seconds']}s ({report['rows_per_second']} rows/s)"
+    )
+    for error in report['errors']:
+        click.echo(f"  line {error['line']}: {error['error']}")
+
+
+@admin_bp.cli.command("export-qr-codes")
+@click.argument("output", type=click.Path(dir_okay=False, writable=True))
+@click.option("--base-url", required=True, help="Site address the codes point to, e.g. https://example.edu")
+@click.option("--format", "fmt", type=click.Choice(EXPORT_FORMATS), help="Defaults to the OUTPUT extension")
+@click.option("--workers", type=int, help="Render processes (default: QR_EXPORT_WORKERS or one per CPU)")
+def export_qr_codes_command(output, base_url, fmt, workers):
+    """Write every instructor's QR code to a printable PDF or a ZIP of PNGs"""
+    fmt = fmt or os.path.splitext(output)[1].lstrip('.').lower()
+    if fmt not in EXPORT_FORMATS:
+        raise click.BadParameter("use a .pdf or .zip file name, or pass --format", param_hint="OUTPUT")
+    
+    instructors = export_instructors()
+    with open(output, 'wb') as f:
+        for chunk in export_qr_codes(instructors, base_url, fmt, workers or current_app.config['QR_EXPORT_WORKERS']):
+            f.write(chunk)
+    click.echo(f"Exported {len(instructors)} QR code(s) to {output}")
+
+
+@admin_bp.cli.command("export-messages")
+@click.argument("output", type=click.Path(dir_okay=False, writable=True, allow_dash=True))
+@click.option("--instructor", "code", help="Only this instructor's inbox (unique code)")
+@click.option("--since", help="Messages from this ISO date/time on")
+@click.option("--until", help="Messages before this ISO date/time (a bare date includes that day)")
+@click.option("--format", "fmt", type=click.Choice(MESSAGE_FORMATS), help="Defaults to the OUTPUT extension")
+@click.option("--chunk-size", default=MESSAGE_CHUNK_SIZE, show_default=True, help="Messages read per query")
+def export_messages_command(output, code, since, until, fmt, chunk_size):
+    """Write messages to a CSV or JSONL file ("-" for stdout), oldest first"""
+    fmt = fmt or os.path.splitext(output)[1].lstrip('.').lower()
+    if fmt not in MESSAGE_FORMATS:
+        raise click.BadParameter("use a .csv or .jsonl file name, or pass --format", param_hint="OUTPUT")
+    
+    instructor_id = None
+    if code:
+        instructor_id = db.session.query(Instructor.id).filter_by(unique_code=code).scalar()
+        if instructor_id is None:
+            raise click.BadParameter(f"no instructor with code {code}", param_hint="--instructor")
+    try:
+        since = parse_date_filter(since)
+        until = parse_date_filter(until, end=True)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    
+    with click.open_file(output, 'wb') as f:
+        for chunk in export_messages(fmt, instructor_id, since, until, chunk_size):
+            f.write(chunk)
+    if output != '-':
+        click.echo(f"Exported messages to {output}")
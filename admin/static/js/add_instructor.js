@@ -0,0 +1,96 @@
+// Elements
+const nameInput = document.getElementById('name');
+const colorInput = document.getElementById('color');
+const colorValue = document.querySelector('.color-value');
+
+// QR Code Elements
+const generateBtn = document.getElementById('generateQRBtn');
+const qrPlaceholder = document.getElementById('qrPlaceholder');
+const qrImageContainer = document.getElementById('qrImageContainer');
+const qrPreviewImage = document.getElementById('qrPreviewImage');
+const qrInfo = document.getElementById('qrInfo');
+const urlPreview = document.getElementById('urlPreview');
+const qrError = document.getElementById('qrError');
+
+// Store generated QR data
+let generatedQRData = null;
+
+// Update color value display
+colorInput.addEventListener('input', function() {
+    colorValue.textContent = this.value;
+});
+
+// Generate QR Code
+generateBtn.addEventListener('click', function() {
+    const name = nameInput.value.trim();
+
+    if (!name) {
+        alert('Please enter an instructor name first!');
+        nameInput.focus();
+        return;
+    }
+
+    qrError.style.display = 'none';
+
+    // Show loading state
+    generateBtn.disabled = true;
+    generateBtn.innerHTML = '<span class="btn-icon">⏳</span> Generating...';
+
+    const baseUrl = window.location.origin;
+    const generateUrl = baseUrl + '/valentine/admin/generate-qr-preview';
+
+    fetch(generateUrl, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({
+            name: name,
+            // Keep the same preview code so repeat previews are served from cache
+            temp_code: generatedQRData ? generatedQRData.temp_code : null
+        })
+    })
+    .then(response => response.json())
+    .then(data => {
+        if (data.success) {
+            qrPreviewImage.src = 'data:image/png;base64,' + data.qr_code;
+            qrPlaceholder.style.display = 'none';
+            qrImageContainer.style.display = 'block';
+
+            urlPreview.textContent = data.preview_url;
+            qrInfo.style.display = 'block';
+
+            generatedQRData = data;
+
+            generateBtn.disabled = false;
+            generateBtn.innerHTML = '<span class="btn-icon">✅</span> Regenerate QR Code';
+        } else {
+            throw new Error(data.error || 'Failed to generate QR code');
+        }
+    })
+    .catch(error => {
+        console.error('Error:', error);
+        qrError.textContent = 'Error: ' + error.message;
+        qrError.style.display = 'block';
+
+        generateBtn.disabled = false;
+        generateBtn.innerHTML = '<span class="btn-icon">🔲</span> Generate QR Code';
+
+        qrPlaceholder.style.display = 'block';
+        qrImageContainer.style.display = 'none';
+        qrInfo.style.display = 'none';
+    });
+});
+
+// Form submission
+document.getElementById('instructorForm').addEventListener('submit', function(e) {
+    if (!generatedQRData) {
+        e.preventDefault();
+        alert('Please generate a QR code first!');
+        return;
+    }
+
+    const submitBtn = document.getElementById('submitBtn');
+    submitBtn.disabled = true;
+    submitBtn.innerHTML = '<span class="btn-icon">⏳</span> Creating...';
+});
@@ -0,0 +1,73 @@
+// Modal functions
+function openModal() {
+    document.getElementById('studentModal').classList.add('show');
+}
+
+function closeModal() {
+    document.getElementById('studentModal').classList.remove('show');
+}
+
+// Close modal when clicking outside
+window.onclick = function(event) {
+    const modal = document.getElementById('studentModal');
+    if (event.target == modal) {
+        closeModal();
+    }
+}
+
+// Bulk import: upload the roster and show the import report
+document.getElementById('importForm').addEventListener('submit', function(e) {
+    e.preventDefault();
+    const button = document.getElementById('importBtn');
+    button.disabled = true;
+    button.innerHTML = '<span>⏳</span> Importing...';
+
+    fetch(this.action, { method: 'POST', body: new FormData(this) })
+        .then(response => response.json())
+        .then(data => {
+            if (!data.success) {
+                throw new Error(data.error || 'Import failed');
+            }
+            alert(`Imported ${data.inserted} students (${data.duplicates} duplicate, ${data.invalid} invalid) in ${data.seconds}s`);
+            window.location.reload();
+        })
+        .catch(error => {
+            alert('Error: ' + error.message);
+            button.disabled = false;
+            button.innerHTML = '<span>📤</span> Import';
+        });
+});
+
+// Download QR Code function
+function downloadQRCode(instructorId, instructorName) {
+    const img = document.getElementById('qr-' + instructorId);
+    const link = document.createElement('a');
+    const cleanName = instructorName.replace(/[^a-zA-Z0-9]/g, '_');
+    link.download = `${cleanName}_QR.png`;
+    link.href = img.src;
+    link.click();
+    showToast();
+}
+
+function showToast() {
+    const toast = document.getElementById('downloadToast');
+    toast.style.display = 'block';
+    setTimeout(function() {
+        toast.style.display = 'none';
+    }, 2000);
+}
+
+// Auto-hide flash messages
+setTimeout(function() {
+    const flashMessages = document.querySelectorAll('.flash-message');
+    flashMessages.forEach(function(message) {
+        message.style.transition = 'opacity 0.5s ease';
+        message.style.opacity = '0';
+        setTimeout(function() {
+            message.remove();
+        }, 500);
+    });
+}, 4000);
+
+// Touch-friendly interactions
+document.addEventListener('touchstart', function(){}, {passive: true});
@@ -0,0 +1,118 @@
+// Simple global function for download
+function downloadQRCode() {
+    const img = document.getElementById('qrCodeImg');
+    const instructorName = document.body.dataset.instructorName.replace(/[^a-zA-Z0-9]/g, '_');
+    const button = document.getElementById('downloadBtn');
+
+    if (!img || !img.src) {
+        alert('QR Code not found!');
+        return;
+    }
+
+    // Store original button text
+    const originalText = button.innerHTML;
+
+    // Show loading
+    button.innerHTML = '<span class="btn-icon">⏳</span> Downloading...';
+    button.disabled = true;
+    button.style.opacity = '0.8';
+
+    try {
+        // Create download link
+        const link = document.createElement('a');
+        link.download = `${instructorName}_QRCode.png`;
+        link.href = img.src;
+
+        // Append to body, click, and remove
+        document.body.appendChild(link);
+        link.click();
+
+        // Clean up
+        setTimeout(() => {
+            document.body.removeChild(link);
+
+            // Reset button
+            button.innerHTML = originalText;
+            button.disabled = false;
+            button.style.opacity = '1';
+
+            // Show success message
+            showMessage('✅ QR Code downloaded!');
+        }, 100);
+
+    } catch (error) {
+        console.error('Download error:', error);
+        alert('Failed to download. Please try again.');
+
+        // Reset button
+        button.innerHTML = originalText;
+        button.disabled = false;
+        button.style.opacity = '1';
+    }
+
+    return false; // Prevent any default behavior
+}
+
+// Simple message function
+function showMessage(text) {
+    // Remove existing message
+    const oldMsg = document.querySelector('.copy-feedback');
+    if (oldMsg) oldMsg.remove();
+
+    // Create new message
+    const msg = document.createElement('div');
+    msg.className = 'copy-feedback';
+    msg.textContent = text;
+    document.body.appendChild(msg);
+
+    // Remove after 2 seconds
+    setTimeout(() => {
+        msg.style.opacity = '0';
+        setTimeout(() => msg.remove(), 300);
+    }, 2000);
+}
+
+// Copy URL function
+document.getElementById('urlBox')?.addEventListener('click', function() {
+    const url = this.textContent.trim();
+
+    // Copy to clipboard
+    if (navigator.clipboard && navigator.clipboard.writeText) {
+        navigator.clipboard.writeText(url).then(() => {
+            showMessage('✅ Link copied!');
+        }).catch(() => {
+            fallbackCopy(url);
+        });
+    } else {
+        fallbackCopy(url);
+    }
+});
+
+// Copy code function
+document.getElementById('uniqueCode')?.addEventListener('click', function() {
+    const code = this.textContent.trim();
+    fallbackCopy(code);
+    showMessage('✅ Code copied!');
+});
+
+// Fallback copy
+function fallbackCopy(text) {
+    const textarea = document.createElement('textarea');
+    textarea.value = text;
+    textarea.style.position = 'fixed';
+    textarea.style.opacity = '0';
+    document.body.appendChild(textarea);
+    textarea.select();
+    textarea.setSelectionRange(0, 99999);
+    document.execCommand('copy');
+    document.body.removeChild(textarea);
+    showMessage('✅ Copied!');
+}
+
+// Ensure dashboard link works
+document.getElementById('dashboardBtn')?.addEventListener('click', function(e) {
+    // Let the link work normally
+    return true;
+});
+
+console.log('Page loaded, download button ready');
@@ -0,0 +1,104 @@
+// Official student roster: loads pages from the JSON API on demand
+function initRoster(options) {
+    const tableBody = document.getElementById(options.tableBodyId);
+    const searchInput = document.getElementById(options.searchInputId);
+    const moreButton = document.getElementById(options.moreButtonId);
+    const countElements = document.querySelectorAll(options.countSelector);
+    const emptyState = document.getElementById(options.emptyStateId);
+    const tableWrapper = document.getElementById(options.tableWrapperId);
+
+    let nextCursor = null;
+    let searchTimer = null;
+    let requestId = 0;
+
+    function cell(text, className) {
+        const td = document.createElement('td');
+        const span = document.createElement('span');
+        span.textContent = text;
+        if (className) {
+            span.className = className;
+        }
+        td.appendChild(span);
+        return td;
+    }
+
+    function deleteCell(student) {
+        const td = document.createElement('td');
+        const form = document.createElement('form');
+        form.method = 'POST';
+        form.action = student.delete_url;
+        form.style.display = 'inline';
+        form.onsubmit = function() {
+            return confirm(`Delete ${student.first_name} ${student.last_name}?`);
+        };
+        const button = document.createElement('button');
+        button.type = 'submit';
+        button.className = 'btn-delete';
+        button.title = 'Delete Student';
+        button.textContent = '🗑️';
+        form.appendChild(button);
+        td.appendChild(form);
+        return td;
+    }
+
+    function addRows(students) {
+        students.forEach(function(student) {
+            const tr = document.createElement('tr');
+            tr.appendChild(cell(student.student_id, 'student-id'));
+            tr.appendChild(cell(student.first_name, 'student-name'));
+            tr.appendChild(cell(student.last_name, 'student-name'));
+            tr.appendChild(deleteCell(student));
+            tableBody.appendChild(tr);
+        });
+    }
+
+    function loadPage(reset) {
+        const params = new URLSearchParams();
+        const search = searchInput.value.trim();
+        if (search) {
+            params.set('q', search);
+        }
+        if (!reset && nextCursor) {
+            params.set('after', nextCursor);
+        }
+
+        const thisRequest = ++requestId;
+        moreButton.disabled = true;
+
+        fetch(options.url + '?' + params.toString())
+            .then(response => response.json())
+            .then(data => {
+                // Ignore responses for searches the admin has already typed past
+                if (thisRequest !== requestId) {
+                    return;
+                }
+                if (reset) {
+                    tableBody.innerHTML = '';
+                }
+                if (data.total !== undefined && !search) {
+                    countElements.forEach(el => el.textContent = data.total);
+                }
+                addRows(data.students);
+                nextCursor = data.next_cursor;
+
+                const hasRows = tableBody.children.length > 0;
+                tableWrapper.style.display = hasRows ? '' : 'none';
+                emptyState.style.display = hasRows ? 'none' : '';
+                moreButton.style.display = nextCursor ? '' : 'none';
+                moreButton.disabled = false;
+            })
+            .catch(error => {
+                console.error('Error loading students:', error);
+                moreButton.disabled = false;
+            });
+    }
+
+    searchInput.addEventListener('input', function() {
+        clearTimeout(searchTimer);
+        searchTimer = setTimeout(() => loadPage(true), 250);
+    });
+
+    moreButton.addEventListener('click', () => loadPage(false));
+
+    loadPage(true);
+}
@@ -0,0 +1,28 @@
+// Add floating hearts effect
+function createHeart() {
+    const heart = document.createElement('div');
+    heart.innerHTML = ['❤️', '💖', '💘', '💝'][Math.floor(Math.random() * 4)];
+    heart.style.position = 'fixed';
+    heart.style.left = Math.random() * 100 + '%';
+    heart.style.top = '-20px';
+    heart.style.fontSize = (Math.random() * 20 + 10) + 'px';
+    heart.style.opacity = '0.3';
+    heart.style.pointerEvents = 'none';
+    heart.style.animation = 'fall ' + (Math.random() * 3 + 2) + 's linear';
+    document.body.appendChild(heart);
+
+    setTimeout(() => heart.remove(), 5000);
+}
+
+const style = document.createElement('style');
+style.textContent = `
+    @keyframes fall {
+        to {
+            transform: translateY(100vh) rotate(360deg);
+        }
+    }
+`;
+document.head.appendChild(style);
+
+// Create hearts every second
+setInterval(createHeart, 1000);
@@ -0,0 +1,156 @@
+import csv
+import io
+import itertools
+import time
+from sqlalchemy import insert
+from models import OfficialStudent
+from extensions import db
+
+# Rows inserted per transaction
+IMPORT_CHUNK_SIZE = 1000
+
+# Only the first few invalid rows are listed in the report
+MAX_REPORTED_ERRORS = 100
+
+# Accepted header spellings for each column
+HEADER_ALIASES = {
+    'student_id': 'student_id',
+    'id': 'student_id',
+    'id_number': 'student_id',
+    'student_number': 'student_id',
+    'first_name': 'first_name',
+    'firstname': 'first_name',
+    'given_name': 'first_name',
+    'last_name': 'last_name',
+    'lastname': 'last_name',
+    'surname': 'last_name',
+}
+
+COLUMNS = ('student_id', 'first_name', 'last_name')
+
+
+def normalize_header(header):
+    """Map a spreadsheet header row onto student_id/first_name/last_name positions"""
+    keys = [HEADER_ALIASES.get(str(h or '').strip().lower().replace(' ', '_')) for h in header]
+    if all(column in keys for column in COLUMNS):
+        return [keys.index(column) for column in COLUMNS]
+    return None
+
+
+def iter_csv_rows(stream):
+    reader = csv.reader(io.TextIOWrapper(stream, encoding='utf-8-sig', newline=''))
+    yield from reader
+
+
+def iter_xlsx_rows(stream):
+    try:
+        import openpyxl
+    except ImportError:
+        raise ValueError('XLSX import requires the openpyxl package')
+
+    workbook = openpyxl.load_workbook(stream, read_only=True, data_only=True)
+    try:
+        yield from workbook.active.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def iter_rows(stream, filename):
+    """Yield (line_number, student_id, first_name, last_name) from a CSV or XLSX upload"""
+    if filename.lower().endswith('.xlsx'):
+        rows = iter_xlsx_rows(stream)
+    elif filename.lower().endswith('.csv'):
+        rows = iter_csv_rows(stream)
+    else:
+        raise ValueError('Only .csv and .xlsx files are supported')
+
+    # Use the header row if there is one, otherwise assume ID, first, last
+    first = next(rows, None)
+    if first is None:
+        return
+    positions = normalize_header(first)
+    line_number = 1
+    if positions is None:
+        positions = [0, 1, 2]
+        rows = itertools.chain([first], rows)
+        line_number = 0
+
+    for row in rows:
+        line_number += 1
+        values = [row[i] if i < len(row) else None for i in positions]
+        yield (line_number, *[str(v).strip() if v is not None else '' for v in values])
+
+
+def validate_row(student_id, first_name, last_name):
+    """Return an error message for a bad row, or None if it can be imported"""
+    if not student_id:
+        return 'missing student ID'
+    if not first_name or not last_name:
+        return 'missing name'
+    if len(student_id) > 50:
+        return 'student ID longer than 50 characters'
+    if len(first_name) > 100 or len(last_name) > 100:
+        return 'name longer than 100 characters'
+    return None
+
+
+def import_chunk(chunk, seen, report):
+    """De-duplicate one chunk against the database and insert it in a single transaction"""
+    ids = [row[1] for row in chunk]
+    existing = {
+        student_id for (student_id,) in db.session.query(OfficialStudent.student_id)
+        .filter(OfficialStudent.student_id.in_(ids))
+    }
+
+    new_rows = []
+    for line_number, student_id, first_name, last_name in chunk:
+        if student_id in existing or student_id in seen:
+            report['duplicates'] += 1
+            continue
+        seen.add(student_id)
+        new_rows.append({
+            'student_id': student_id,
+            'first_name': first_name,
+            'last_name': last_name,
+        })
+
+    if new_rows:
+        db.session.execute(insert(OfficialStudent), new_rows)
+    db.session.commit()
+    report['inserted'] += len(new_rows)
+
+
+def import_students(rows, chunk_size=IMPORT_CHUNK_SIZE):
+    """Stream rows from iter_rows() into official_students and return an import report"""
+    report = {
+        'rows': 0,
+        'inserted': 0,
+        'duplicates': 0,
+        'invalid': 0,
+        'errors': [],
+    }
+    seen = set()
+    chunk = []
+    start = time.perf_counter()
+
+    for line_number, student_id, first_name, last_name in rows:
+        report['rows'] += 1
+        error = validate_row(student_id, first_name, last_name)
+        if error:
+            report['invalid'] += 1
+            if len(report['errors']) < MAX_REPORTED_ERRORS:
+                report['errors'].append({'line': line_number, 'error': error})
+            continue
+
+        chunk.append((line_number, student_id, first_name, last_name))
+        if len(chunk) >= chunk_size:
+            import_chunk(chunk, seen, report)
+            chunk = []
+
+    if chunk:
+        import_chunk(chunk, seen, report)
+
+    elapsed = time.perf_counter() - start
+    report['seconds'] = round(elapsed, 3)
+    report['rows_per_second'] = round(report['rows'] / elapsed, 1) if elapsed else None
+    return report
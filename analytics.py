@@ -0,0 +1,97 @@
+import re
+from datetime import timedelta
+from extensions import db
+from models import Instructor, MessageRollup, manila_now, rebuild_message_rollups
+from archive import ARCHIVE_SCHEMA, attach_archive
+
+# Accepted forms for the since/until filters: a day or a day and hour
+HOUR_FORMAT = re.compile(r'^\d{4}-\d{2}-\d{2}([ T]\d{2})?$')
+
+
+def parse_hour(value):
+    """Normalize a 'YYYY-MM-DD' or 'YYYY-MM-DD HH' filter to a rollup hour key.
+
+    Returns None for an empty value; raises ValueError for anything else.
+    """
+    if not value:
+        return None
+    if not HOUR_FORMAT.match(value):
+        raise ValueError(f"Expected YYYY-MM-DD or YYYY-MM-DD HH, got {value!r}")
+    return value.replace('T', ' ')
+
+
+def _in_range(query, since, until):
+    if since:
+        query = query.filter(MessageRollup.hour >= since)
+    if until:
+        query = query.filter(MessageRollup.hour < until)
+    return query
+
+
+def rollup_totals(dimension, since=None, until=None):
+    """(label, messages) for one dimension between two hour keys, busiest first"""
+    total = db.func.sum(MessageRollup.message_count)
+    query = db.session.query(MessageRollup.label, total)\
+        .filter(MessageRollup.dimension == dimension)
+    return _in_range(query, since, until)\
+        .group_by(MessageRollup.label)\
+        .having(total > 0)\
+        .order_by(total.desc(), MessageRollup.label)\
+        .all()
+
+
+def hourly_totals(since=None, until=None):
+    """(hour, messages) for every hour with messages, in order"""
+    query = db.session.query(MessageRollup.hour, MessageRollup.message_count)\
+        .filter(MessageRollup.dimension == 'total', MessageRollup.message_count > 0)
+    return _in_range(query, since, until).order_by(MessageRollup.hour).all()
+
+
+def analytics_report(since=None, until=None):
+    """Message volume by instructor, course, year and hour, read from the rollups only"""
+    names = dict(db.session.query(Instructor.id, Instructor.name))
+    hours = hourly_totals(since, until)
+    return {
+        'since': since,
+        'until': until,
+        'total': sum(count for _, count in hours),
+        'instructors': [
+            {'id': int(label), 'name': names.get(int(label)), 'messages': count}
+            for label, count in rollup_totals('instructor', since, until)
+        ],
+        'courses': [{'course': label, 'messages': count} for label, count in rollup_totals('course', since, until)],
+        'years': [{'year': label, 'messages': count} for label, count in rollup_totals('year', since, until)],
+        'hours': [{'hour': hour, 'messages': count} for hour, count in hours],
+    }
+
+
+def catch_up_rollups(hours=None):
+    """Recount the rollups for the last `hours` hours (None recounts everything).
+
+    Archived messages are counted along with the live ones, so past
+    seasons keep their rollups. Returns the first hour recounted as a
+    datetime, or None for a full recount.
+    """
+    since = manila_now() - timedelta(hours=hours) if hours is not None else None
+    with db.engine.connect() as connection:
+        # Transactions are issued by hand: ATTACH can't run inside one
+        connection = connection.execution_options(isolation_level='AUTOCOMMIT')
+        attached = attach_archive(connection)
+        source = 'student_messages'
+        if attached:
+            source = (
+                f"(SELECT student_id, instructor_id, created_at FROM main.student_messages "
+                f"UNION ALL SELECT student_id, instructor_id, created_at FROM {ARCHIVE_SCHEMA}.student_messages)"
+            )
+        try:
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
+            try:
+                rebuild_message_rollups(connection, since, source)
+                connection.exec_driver_sql("COMMIT")
+            except Exception:
+                connection.exec_driver_sql("ROLLBACK")
+                raise
+        finally:
+            if attached:
+                connection.exec_driver_sql(f"DETACH DATABASE {ARCHIVE_SCHEMA}")
+    return since
@@ -1,34 +1,99 @@
-from flask import Flask
-from extensions import db
+import importlib
+import click
+from flask import Flask, current_app
+from config import Config
+from extensions import cache, init_db, upgrade_schema
+from profiling import init_profiling
+from pubsub import init_message_broker
+from assets import init_assets
+from compression import init_compression
+from moderation import init_moderation
+from student.passwords import init_passwords
 import os
 
+# Blueprints that APP_BLUEPRINTS can name: (module, attribute, URL prefix,
+# blueprints whose endpoints its pages link to). Modules are only imported
+# for the blueprints a worker registers.
+BLUEPRINTS = {
+    'admin': ('admin.routes', 'admin_bp', '/valentine/admin', ('instructor',)),
+    'instructor': ('instructor.routes', 'instructor_bp', '/valentine/instructor', ()),
+    'student': ('student.routes', 'student_bp', '/valentine/student', ()),
+}
+
+
+def init_schema():
+    """Create tables if they don't exist and bring older databases up to date.
+
+    Returns the columns that were added, as "table.column".
+    """
+    from models import COUNTER_COLUMNS, reconcile_message_counters
+    from archive import upgrade_message_ids
+
+    added_columns = upgrade_schema()
+    # Older message tables could hand archived ids out again
+    renumbered = upgrade_message_ids()
+    if renumbered:
+        current_app.logger.warning(f"Gave {renumbered} message(s) new ids; theirs were already archived")
+
+    # New counter columns start at zero, so fill them from existing messages
+    if any(column in COUNTER_COLUMNS for column in added_columns):
+        reconcile_message_counters()
+    return added_columns
+
+
 def create_app():
     app = Flask(__name__)
 
-    # Use SQLite for PythonAnywhere deployment
-    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite:///valentine.db'
-    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
-    app.config['SECRET_KEY'] = 'valentine_secret'
+    app.config.from_object(Config)
+    app.config.from_prefixed_env()
 
-    db.init_app(app)
+    init_db(app)
+    cache.init_app(app)
+    init_profiling(app)
+    init_message_broker(app)
+    init_compression(app)
+    init_moderation(app)
+    # Logins (student) and the hashing metrics (admin) share one pool
+    init_passwords(app)
 
     # Register Blueprints
-    from admin.routes import admin_bp
-    from instructor.routes import instructor_bp
-    from student.routes import student_bp
+    names = app.config['APP_BLUEPRINTS']
+    for name in names:
+        if name not in BLUEPRINTS:
+            raise ValueError(f"Unknown blueprint in APP_BLUEPRINTS: {name}")
+        missing = [required for required in BLUEPRINTS[name][3] if required not in names]
+        if missing:
+            raise ValueError(f"APP_BLUEPRINTS: '{name}' needs {', '.join(map(repr, missing))} too")
+
+    for name in names:
+        module, attribute, url_prefix, _ = BLUEPRINTS[name]
+        blueprint = getattr(importlib.import_module(module), attribute)
+        app.register_blueprint(blueprint, url_prefix=url_prefix)
 
-    app.register_blueprint(admin_bp, url_prefix="/valentine/admin")
-    app.register_blueprint(instructor_bp, url_prefix="/valentine/instructor")
-    app.register_blueprint(student_bp, url_prefix="/valentine/student")
+    # Static CSS/JS is served minified under content-hashed names
+    init_assets(app)
 
-    # Create tables if they don't exist
-    with app.app_context():
-        db.create_all()
+    if app.config['SCHEMA_UPGRADE_ON_START']:
+        with app.app_context():
+            init_schema()
+
+    @app.cli.command('init-db')
+    def init_db_command():
+        """Create missing tables, columns and indexes (run after each deploy)"""
+        added_columns = init_schema()
+        click.echo(f"Schema up to date; added columns: {', '.join(added_columns) or 'none'}")
 
     return app
 
 
-app = create_app()
+def __getattr__(name):
+    # "app:app" (WSGI servers, flask run) builds the app on first access, so
+    # importing create_app from here doesn't build one
+    if name == 'app':
+        app = globals()['app'] = create_app()
+        return app
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 if __name__ == "__main__":
-    app.run(debug=True)
\ No newline at end of file
+    create_app().run(debug=True)
@@ -0,0 +1,281 @@
+import os
+import time
+from types import SimpleNamespace
+from sqlalchemy.schema import CreateIndex, CreateTable
+from extensions import add_missing_columns, db
+from models import (ROLLUP_DDL, SEARCH_DDL, ArchivedMessage, Student, StudentMessage, add_message_rollups,
+                    reconcile_message_counters)
+
+# Name the archive database is attached under while messages are moved
+ARCHIVE_SCHEMA = 'archive'
+
+ARCHIVE_COLUMNS = 'id, student_id, instructor_id, message, is_approved, is_reviewed, created_at'
+
+VACUUM_MODES = ('incremental', 'full', 'none')
+
+# An archived copy counts as the same message when all of these match
+# (moderation state can differ: it is copied, not compared)
+SAME_MESSAGE = " AND ".join(
+    f"archived.{column} IS live.{column}" for column in ('student_id', 'instructor_id', 'message', 'created_at')
+)
+
+# Shown for archived messages whose sender has since been deleted
+FORMER_STUDENT = SimpleNamespace(name='Former student', course='', year='')
+
+
+class ArchiveConflict(Exception):
+    """A live message has the id of a different, already archived message"""
+
+
+def archive_path():
+    return db.engines['archive'].url.database
+
+
+def attach_archive(connection):
+    """ATTACH the archive database to a connection that is outside a transaction.
+
+    Returns False, without attaching, if nothing has been archived yet.
+    Columns added to messages since the archive file was created are added
+    to it here, so older archives take every column that is moved.
+    """
+    path = archive_path()
+    if not os.path.exists(path):
+        return False
+    connection.exec_driver_sql(f"ATTACH DATABASE ? AS {ARCHIVE_SCHEMA}", (path,))
+    if connection.exec_driver_sql(
+        f"SELECT 1 FROM {ARCHIVE_SCHEMA}.sqlite_master WHERE name = 'student_messages'"
+    ).first():
+        add_missing_columns(connection, ArchivedMessage.__table__, ARCHIVE_SCHEMA)
+        return True
+    connection.exec_driver_sql(f"DETACH DATABASE {ARCHIVE_SCHEMA}")
+    return False
+
+
+def rebuild_message_table(connection):
+    """Recreate student_messages with AUTOINCREMENT, keeping its rows, indexes and triggers"""
+    table = StudentMessage.__table__
+    columns = ', '.join(column.name for column in table.columns)
+    triggers = connection.exec_driver_sql(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'student_messages'"
+    ).scalars().all()
+    for name in triggers:
+        connection.exec_driver_sql(f"DROP TRIGGER {name}")
+
+    create = str(CreateTable(table).compile(dialect=connection.dialect))
+    connection.exec_driver_sql(create.replace("CREATE TABLE student_messages ", "CREATE TABLE student_messages_new ", 1))
+    connection.exec_driver_sql(f"INSERT INTO student_messages_new ({columns}) SELECT {columns} FROM student_messages")
+    connection.exec_driver_sql("DROP TABLE student_messages")
+    connection.exec_driver_sql("ALTER TABLE student_messages_new RENAME TO student_messages")
+
+    for index in table.indexes:
+        connection.execute(CreateIndex(index))
+    # Search and rollup triggers come back as they were; their tables
+    # already hold these rows
+    for statement in SEARCH_DDL + ROLLUP_DDL:
+        connection.exec_driver_sql(statement)
+
+
+def upgrade_message_ids():
+    """Make sure message ids are never handed out twice.
+
+    Databases created before student_messages had AUTOINCREMENT reuse the
+    ids of archived messages once the newest ones are moved out. Their
+    table is rebuilt, the id sequence is moved past the highest archived
+    id, and live messages that already took an archived message's id get
+    new ids. Returns the number of messages renumbered.
+    """
+    if db.engine.dialect.name != 'sqlite':
+        return 0
+
+    with db.engine.connect() as connection:
+        # Transactions are issued by hand: ATTACH can't run inside one
+        connection = connection.execution_options(isolation_level='AUTOCOMMIT')
+        create = connection.exec_driver_sql(
+            "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'student_messages'"
+        ).scalar()
+        if 'AUTOINCREMENT' not in create.upper():
+            # Keeps the RENAME from checking triggers on other tables that
+            # name student_messages while it doesn't exist
+            connection.exec_driver_sql("PRAGMA legacy_alter_table = ON")
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
+            try:
+                rebuild_message_table(connection)
+                connection.exec_driver_sql("COMMIT")
+            except Exception:
+                connection.exec_driver_sql("ROLLBACK")
+                raise
+            finally:
+                connection.exec_driver_sql("PRAGMA legacy_alter_table = OFF")
+
+        attached = attach_archive(connection)
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+        try:
+            archived = 0
+            conflicts = []
+            if attached:
+                archived = connection.exec_driver_sql(
+                    f"SELECT coalesce(max(id), 0) FROM {ARCHIVE_SCHEMA}.student_messages"
+                ).scalar()
+                conflicts = connection.exec_driver_sql(
+                    f"SELECT live.id FROM main.student_messages AS live "
+                    f"JOIN {ARCHIVE_SCHEMA}.student_messages AS archived ON archived.id = live.id "
+                    f"WHERE NOT ({SAME_MESSAGE}) ORDER BY live.id"
+                ).scalars().all()
+            next_id = max(archived, connection.exec_driver_sql(
+                "SELECT coalesce(max(id), 0) FROM main.student_messages"
+            ).scalar())
+
+            # The search index is keyed by message id, so it moves along
+            for old_id in conflicts:
+                next_id += 1
+                connection.exec_driver_sql("UPDATE main.student_messages SET id = ? WHERE id = ?", (next_id, old_id))
+                connection.exec_driver_sql("UPDATE main.student_messages_fts SET rowid = ? WHERE rowid = ?",
+                                           (next_id, old_id))
+
+            # Only ever moves the sequence forward
+            connection.exec_driver_sql(
+                "UPDATE main.sqlite_sequence SET seq = ? WHERE name = 'student_messages' AND seq < ?",
+                (next_id, next_id)
+            )
+            connection.exec_driver_sql(
+                "INSERT INTO main.sqlite_sequence (name, seq) SELECT 'student_messages', ? "
+                "WHERE NOT EXISTS (SELECT 1 FROM main.sqlite_sequence WHERE name = 'student_messages')",
+                (next_id,)
+            )
+            connection.exec_driver_sql("COMMIT")
+        except Exception:
+            connection.exec_driver_sql("ROLLBACK")
+            raise
+        finally:
+            if attached:
+                connection.exec_driver_sql(f"DETACH DATABASE {ARCHIVE_SCHEMA}")
+    return len(conflicts)
+
+
+def database_size():
+    path = db.engine.url.database
+    return sum(os.path.getsize(p) for p in (path, f'{path}-wal') if os.path.exists(p))
+
+
+def move_batch(connection, cutoff, batch_size):
+    """Move up to batch_size messages older than cutoff in one transaction; returns how many moved"""
+    connection.exec_driver_sql("BEGIN IMMEDIATE")
+    try:
+        connection.exec_driver_sql(
+            "INSERT INTO temp.archive_batch (id) SELECT id FROM main.student_messages "
+            "WHERE created_at < ? ORDER BY created_at, id LIMIT ?",
+            (cutoff.strftime('%Y-%m-%d %H:%M:%S.%f'), batch_size)
+        )
+        batch = "SELECT id FROM temp.archive_batch"
+        moved = connection.exec_driver_sql("SELECT count(*) FROM temp.archive_batch").scalar()
+        if moved:
+            # Rows already in the archive were copied by a run that died
+            # before its delete (WAL mode doesn't commit the two files
+            # atomically), so they are skipped here
+            connection.exec_driver_sql(
+                f"INSERT INTO {ARCHIVE_SCHEMA}.student_messages ({ARCHIVE_COLUMNS}) "
+                f"SELECT {ARCHIVE_COLUMNS} FROM main.student_messages AS live WHERE live.id IN ({batch}) "
+                f"AND NOT EXISTS (SELECT 1 FROM {ARCHIVE_SCHEMA}.student_messages AS archived "
+                f"WHERE archived.id = live.id)"
+            )
+            # Only delete what the archive now holds, unchanged. An archived
+            # row with the same id but other content is a different message
+            # (ids reused before student_messages had AUTOINCREMENT): stop
+            # rather than lose either of them.
+            conflict = connection.exec_driver_sql(
+                f"SELECT live.id FROM main.student_messages AS live WHERE live.id IN ({batch}) "
+                f"AND NOT EXISTS (SELECT 1 FROM {ARCHIVE_SCHEMA}.student_messages AS archived "
+                f"WHERE archived.id = live.id AND {SAME_MESSAGE}) LIMIT 1"
+            ).scalar()
+            if conflict is not None:
+                raise ArchiveConflict(
+                    f"Message {conflict} has the same id as a different archived message; "
+                    f"nothing in this batch was moved"
+                )
+            # Past seasons stay in the analytics once their messages are gone
+            add_message_rollups(connection, f"m.id IN ({batch})")
+            connection.exec_driver_sql(f"DELETE FROM main.student_messages WHERE id IN ({batch})")
+        connection.exec_driver_sql("DELETE FROM temp.archive_batch")
+        connection.exec_driver_sql("COMMIT")
+        return moved
+    except Exception:
+        connection.exec_driver_sql("ROLLBACK")
+        raise
+
+
+def vacuum_database(mode):
+    """Give the space freed by archiving back to the file system"""
+    if mode == 'none':
+        return
+    with db.engine.connect() as connection:
+        connection = connection.execution_options(isolation_level='AUTOCOMMIT')
+        if mode == 'incremental' and connection.exec_driver_sql("PRAGMA auto_vacuum").scalar() == 2:
+            # Each step of this pragma frees one page, and Python's sqlite3
+            # only steps it once per execute
+            pages = connection.exec_driver_sql("PRAGMA freelist_count").scalar()
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
+            for _ in range(pages):
+                connection.exec_driver_sql("PRAGMA incremental_vacuum")
+            connection.exec_driver_sql("COMMIT")
+        else:
+            if mode == 'incremental':
+                # Switching to incremental takes one full VACUUM; later runs are quick
+                connection.exec_driver_sql("PRAGMA auto_vacuum = INCREMENTAL")
+            connection.exec_driver_sql("VACUUM")
+        # VACUUM goes through the WAL; fold it back in and shrink the WAL file
+        connection.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+
+
+def archive_messages(cutoff, batch_size, vacuum='incremental', progress=None):
+    """Move messages created before cutoff into the archive database, batch by batch.
+
+    Each batch is copied and deleted in its own transaction, so students can
+    keep sending messages in between. Afterwards the message counters are
+    rebuilt from the live messages and the live file is vacuumed. Calls
+    progress(moved_so_far) after every batch.
+    """
+    if vacuum not in VACUUM_MODES:
+        raise ValueError(f"Unknown vacuum mode: {vacuum}")
+
+    start = time.perf_counter()
+    size_before = database_size()
+    db.create_all(bind_key='archive')
+
+    moved = 0
+    with db.engine.connect() as connection:
+        # Transactions are issued by hand: ATTACH can't run inside one
+        connection = connection.execution_options(isolation_level='AUTOCOMMIT')
+        attach_archive(connection)
+        connection.exec_driver_sql("CREATE TEMP TABLE IF NOT EXISTS archive_batch (id INTEGER PRIMARY KEY)")
+        try:
+            while True:
+                count = move_batch(connection, cutoff, batch_size)
+                moved += count
+                if progress and count:
+                    progress(moved)
+                if count < batch_size:
+                    break
+        finally:
+            connection.exec_driver_sql("DROP TABLE IF EXISTS temp.archive_batch")
+            connection.exec_driver_sql(f"DETACH DATABASE {ARCHIVE_SCHEMA}")
+            # Counters only cover the live inbox; batches moved before an
+            # error count too
+            if moved:
+                reconcile_message_counters()
+
+    if moved:
+        vacuum_database(vacuum)
+
+    return {
+        'moved': moved,
+        'seconds': round(time.perf_counter() - start, 2),
+        'size_before': size_before,
+        'size_after': database_size(),
+    }
+
+
+def attach_senders(messages):
+    """Load the senders of archived messages from the live database"""
+    students = {s.id: s for s in Student.query.filter(Student.id.in_({m.student_id for m in messages}))}
+    for message in messages:
+        message.student = students.get(message.student_id, FORMER_STUDENT)
@@ -0,0 +1,208 @@
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import re
+import click
+from flask import request, send_from_directory
+
+# Built files go here, inside each static folder
+DIST_DIR = 'dist'
+
+# Hashed file names never change content, so browsers may keep them for a year
+ASSET_MAX_AGE = 31536000
+
+
+def minify_css(source):
+    source = re.sub(r'/\*.*?\*/', '', source, flags=re.S)
+    source = re.sub(r'\s+', ' ', source)
+    # Spaces before ":" are left alone, as "a :hover" and "a:hover" differ
+    source = re.sub(r'\s*([{};,>])\s*', r'\1', source)
+    source = re.sub(r':\s+', ':', source)
+    return source.replace(';}', '}').strip()
+
+
+def ends_in_template(line, in_template):
+    """Whether a JS template literal is still open at the end of this line"""
+    quote = '`' if in_template else None
+    i = 0
+    while i < len(line):
+        char = line[i]
+        if quote:
+            if char == '\\':
+                i += 1
+            elif char == quote:
+                quote = None
+        elif char in '\'"`':
+            quote = char
+        elif line.startswith('//', i):
+            break
+        i += 1
+    return quote == '`'
+
+
+def minify_js(source):
+    # Only indentation, blank lines and whole-line comments are removed;
+    # line breaks stay so automatic semicolon insertion works the same.
+    # Lines inside a template literal are part of the string and kept as is.
+    lines = []
+    in_template = False
+    for line in source.splitlines():
+        still_open = ends_in_template(line, in_template)
+        if in_template:
+            lines.append(line if still_open else line.rstrip())
+        else:
+            line = line.lstrip() if still_open else line.strip()
+            if line and not line.startswith('//'):
+                lines.append(line)
+        in_template = still_open
+    return '\n'.join(lines) + '\n'
+
+
+MINIFIERS = {'.css': minify_css, '.js': minify_js}
+
+
+def static_folders(app):
+    """(static endpoint, static folder) for the app and every blueprint that has one"""
+    folders = []
+    if app.static_folder:
+        folders.append(('static', app.static_folder))
+    for name, blueprint in app.blueprints.items():
+        if blueprint.static_folder:
+            folders.append((f'{name}.static', blueprint.static_folder))
+    return folders
+
+
+def write_atomic(path, content):
+    """Write bytes via a temporary file, so other workers never read a partial file"""
+    temporary = f'{path}.{os.getpid()}.tmp'
+    with open(temporary, 'wb') as f:
+        f.write(content)
+    os.replace(temporary, path)
+
+
+def prune_dist(folder, manifest):
+    """Delete built files that the manifest no longer lists"""
+    keep = {'manifest.json'}
+    for built in manifest.values():
+        name = os.path.relpath(built, DIST_DIR)
+        keep.update((name, name + '.gz'))
+
+    dist = os.path.join(folder, DIST_DIR)
+    for root, dirs, files in os.walk(dist):
+        for filename in files:
+            name = os.path.relpath(os.path.join(root, filename), dist).replace(os.sep, '/')
+            # Temporary files belong to a build still running in another worker
+            if name not in keep and not filename.endswith('.tmp'):
+                try:
+                    os.remove(os.path.join(root, filename))
+                except FileNotFoundError:
+                    pass
+
+
+def build_folder(folder):
+    """Minify and fingerprint every CSS/JS file in a static folder.
+
+    Returns {source name: hashed name}. Files already built are left alone
+    and the manifest is only rewritten when it changes, so this is cheap to
+    run on every start.
+    """
+    manifest = {}
+    for root, dirs, files in os.walk(folder):
+        dirs[:] = [d for d in dirs if d != DIST_DIR]
+        for filename in sorted(files):
+            base, ext = os.path.splitext(filename)
+            if ext not in MINIFIERS:
+                continue
+
+            path = os.path.join(root, filename)
+            with open(path, encoding='utf-8') as f:
+                content = MINIFIERS[ext](f.read()).encode('utf-8')
+
+            source = os.path.relpath(path, folder).replace(os.sep, '/')
+            digest = hashlib.sha1(content).hexdigest()[:10]
+            built = '/'.join(filter(None, [DIST_DIR, os.path.dirname(source), f'{base}.{digest}{ext}']))
+            manifest[source] = built
+
+            target = os.path.join(folder, built)
+            if os.path.exists(target):
+                continue
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            # Pre-compressed copy first, so the file is never served without
+            # it; mtime=0 keeps the bytes the same between builds
+            write_atomic(target + '.gz', gzip.compress(content, compresslevel=9, mtime=0))
+            write_atomic(target, content)
+
+    if manifest:
+        content = json.dumps(manifest, indent=2, sort_keys=True).encode('utf-8')
+        path = os.path.join(folder, DIST_DIR, 'manifest.json')
+        try:
+            with open(path, 'rb') as f:
+                changed = f.read() != content
+        except FileNotFoundError:
+            changed = True
+        if changed:
+            write_atomic(path, content)
+        prune_dist(folder, manifest)
+    return manifest
+
+
+def load_manifest(folder):
+    try:
+        with open(os.path.join(folder, DIST_DIR, 'manifest.json')) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def serve_asset(folder, filename):
+    """Send a built file, gzipped if the browser accepts it, with immutable caching"""
+    path = os.path.join(folder, filename)
+    if 'gzip' in request.accept_encodings and os.path.exists(path + '.gz'):
+        response = send_from_directory(folder, filename + '.gz', max_age=ASSET_MAX_AGE,
+                                       mimetype=mimetypes.guess_type(filename)[0])
+        response.headers['Content-Encoding'] = 'gzip'
+    else:
+        response = send_from_directory(folder, filename, max_age=ASSET_MAX_AGE)
+    response.vary.add('Accept-Encoding')
+    response.cache_control.immutable = True
+    return response
+
+
+def init_assets(app):
+    """Serve fingerprinted CSS/JS for every static folder.
+
+    url_for('<blueprint>.static', filename='css/x.css') resolves to the
+    built file, so templates keep naming the source file.
+    """
+    manifests = {}
+    for endpoint, folder in static_folders(app):
+        if app.config['ASSETS_BUILD_ON_START']:
+            manifests[endpoint] = build_folder(folder)
+        else:
+            manifests[endpoint] = load_manifest(folder)
+
+        original_view = app.view_functions[endpoint]
+
+        def static_view(filename, folder=folder, original_view=original_view):
+            if filename.startswith(DIST_DIR + '/'):
+                return serve_asset(folder, filename)
+            return original_view(filename=filename)
+
+        app.view_functions[endpoint] = static_view
+
+    app.extensions['assets'] = manifests
+
+    @app.url_defaults
+    def hashed_static_url(endpoint, values):
+        manifest = manifests.get(endpoint)
+        if manifest and values.get('filename') in manifest:
+            values['filename'] = manifest[values['filename']]
+
+    @app.cli.command('build-assets')
+    def build_assets_command():
+        """Minify and fingerprint static CSS/JS (for ASSETS_BUILD_ON_START = False)"""
+        for endpoint, folder in static_folders(app):
+            manifest = build_folder(folder)
+            click.echo(f"{endpoint}: {len(manifest)} files")
@@ -0,0 +1,94 @@
+"""Admin analytics from the hourly rollups against aggregating student_messages.
+
+Seeds throwaway databases of growing size and times the analytics report
+(rollups only) next to the same breakdowns computed with GROUP BY over
+every message.
+
+Usage:
+    python benchmarks/analytics.py [--sizes 10000,100000] [--repeat 10] [--output analytics.json]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from suite import seed
+
+# GROUP BY over every message, one query per breakdown, like the ad-hoc approach
+AD_HOC_QUERIES = (
+    "SELECT instructor_id, count(*) FROM student_messages GROUP BY 1",
+    "SELECT students.course, count(*) FROM student_messages JOIN students ON students.id = student_messages.student_id GROUP BY 1",
+    "SELECT students.year, count(*) FROM student_messages JOIN students ON students.id = student_messages.student_id GROUP BY 1",
+    "SELECT strftime('%Y-%m-%d %H', created_at), count(*) FROM student_messages GROUP BY 1",
+)
+
+
+def timed(call, repeat):
+    from extensions import db
+    from profiling import percentile
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - start) * 1000)
+        db.session.remove()
+    timings.sort()
+    return {'p50_ms': percentile(timings, 0.50), 'p95_ms': percentile(timings, 0.95)}
+
+
+def run_size(args, messages):
+    from extensions import db
+    from analytics import analytics_report
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['FLASK_SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{os.path.join(tmp, "analytics.db")}'
+        os.environ['FLASK_SQLALCHEMY_BINDS'] = json.dumps({'archive': f'sqlite:///{os.path.join(tmp, "archive.db")}'})
+        from app import create_app
+        app = create_app()
+
+        start = time.perf_counter()
+        seed(app, argparse.Namespace(official_students=0, students=args.students, instructors=args.instructors,
+                                     messages=messages, seed=args.seed))
+        seed_seconds = time.perf_counter() - start
+
+        with app.app_context():
+            rollup_rows = db.session.execute(db.text("SELECT count(*) FROM message_rollups")).scalar()
+            return {
+                'seed_seconds': round(seed_seconds, 2),
+                'rollup_rows': rollup_rows,
+                'rollups': timed(analytics_report, args.repeat),
+                'ad hoc': timed(lambda: [db.session.execute(db.text(sql)).all() for sql in AD_HOC_QUERIES], args.repeat),
+            }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='10000,100000', help='message counts, comma separated')
+    parser.add_argument('--students', type=int, default=2000)
+    parser.add_argument('--instructors', type=int, default=40)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=14)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    results = {}
+    for size in (int(size) for size in args.sizes.split(',')):
+        result = results[size] = run_size(args, size)
+        print(f"{size:>9} messages  rollups p50 {result['rollups']['p50_ms']:>7}ms  "
+              f"ad hoc p50 {result['ad hoc']['p50_ms']:>8}ms  ({result['rollup_rows']} rollup rows, "
+              f"seeded in {result['seed_seconds']}s)")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'parameters': vars(args), 'sizes': results}, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
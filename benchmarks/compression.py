@@ -0,0 +1,114 @@
+"""Bytes saved per route by response compression and conditional GETs.
+
+Seeds the same synthetic dataset as suite.py, then fetches each route
+uncompressed, gzipped and (if the brotli package is installed) with Brotli,
+and once more with If-None-Match to check that it comes back as 304.
+
+Usage:
+    python benchmarks/compression.py [--messages 5000] [--output compression.json]
+    FLASK_COMPRESSION_GZIP_LEVEL=9 python benchmarks/compression.py
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from suite import seed, student_client
+
+
+def routes(data):
+    hot_code = data['instructors'][0][1]
+    return [
+        ('login page', 'GET', '/valentine/student/login', None),
+        ('student dashboard', 'GET', '/valentine/student/dashboard', None),
+        ('instructor inbox', 'GET', f'/valentine/instructor/{hot_code}/messages', None),
+        ('admin dashboard', 'GET', '/valentine/admin/', None),
+        ('roster api', 'GET', '/valentine/admin/api/students?limit=200', None),
+        ('qr preview', 'POST', '/valentine/admin/generate-qr-preview', {'name': 'Benchmark', 'temp_code': 'BENCH001'}),
+    ]
+
+
+def fetch(client, method, url, json_body, encoding, etag=None):
+    headers = {'Accept-Encoding': encoding}
+    if etag:
+        headers['If-None-Match'] = etag
+    start = time.perf_counter()
+    response = client.open(url, method=method, json=json_body, headers=headers)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    return response, elapsed_ms
+
+
+def measure(app, data, encodings):
+    client = student_client(app, data['student_ids'][0])
+    results = {}
+    for name, method, url, json_body in routes(data):
+        result = {'url': url}
+        for encoding in encodings:
+            response, elapsed_ms = fetch(client, method, url, json_body, encoding)
+            result[encoding] = {
+                'bytes': len(response.get_data()),
+                'content_encoding': response.headers.get('Content-Encoding'),
+                'ms': round(elapsed_ms, 2),
+            }
+
+        identity = result['identity']['bytes']
+        for encoding in encodings[1:]:
+            sent = result[encoding]['bytes']
+            result[encoding]['saved_pct'] = round((1 - sent / identity) * 100, 1) if identity else 0
+
+        etag = response.headers.get('ETag')
+        if method == 'GET' and etag:
+            repeat, _ = fetch(client, method, url, json_body, encodings[-1], etag)
+            result['repeat_status'] = repeat.status_code
+            result['repeat_bytes'] = len(repeat.get_data())
+        results[name] = result
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--official-students', type=int, default=1000)
+    parser.add_argument('--students', type=int, default=200)
+    parser.add_argument('--instructors', type=int, default=40)
+    parser.add_argument('--messages', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=14)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['FLASK_SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{os.path.join(tmp, "bench.db")}'
+        os.environ['FLASK_SQLALCHEMY_BINDS'] = json.dumps({'archive': f'sqlite:///{os.path.join(tmp, "archive.db")}'})
+        from app import create_app
+        from compression import load_brotli
+        app = create_app()
+        data = seed(app, args)
+
+        encodings = ['identity', 'gzip'] + (['br'] if load_brotli() and app.config['COMPRESSION_BROTLI'] else [])
+        with contextlib.redirect_stdout(io.StringIO()):
+            results = measure(app, data, encodings)
+
+    header = f"{'route':<18} {'identity':>9}" + ''.join(f" {e:>9} {'saved':>6}" for e in encodings[1:]) + "  repeat"
+    print(header)
+    for name, result in results.items():
+        line = f"{name:<18} {result['identity']['bytes']:>9}"
+        for encoding in encodings[1:]:
+            line += f" {result[encoding]['bytes']:>9} {result[encoding]['saved_pct']:>5}%"
+        if 'repeat_status' in result:
+            line += f"  {result['repeat_status']} ({result['repeat_bytes']} bytes)"
+        print(line)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'encodings': encodings, 'routes': results}, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
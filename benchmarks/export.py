@@ -0,0 +1,89 @@
+"""Memory and throughput of the streaming message export.
+
+Seeds throwaway databases of growing size and exports every message as
+CSV and JSONL, recording the peak Python memory (tracemalloc) next to
+loading the same rows with .all() first.
+
+Usage:
+    python benchmarks/export.py [--sizes 20000,200000] [--output export.json]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from suite import seed
+
+
+def measure(call):
+    """Run call() twice and return (seconds, peak MiB, its result).
+
+    tracemalloc slows Python code down several times, so the time comes
+    from a separate run without it.
+    """
+    start = time.perf_counter()
+    result = call()
+    seconds = time.perf_counter() - start
+
+    tracemalloc.start()
+    call()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return round(seconds, 2), round(peak / 2 ** 20, 1), result
+
+
+def run_size(args, messages):
+    from extensions import db
+    from message_export import export_messages
+    from models import StudentMessage
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['FLASK_SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{os.path.join(tmp, "export.db")}'
+        os.environ['FLASK_SQLALCHEMY_BINDS'] = json.dumps({'archive': f'sqlite:///{os.path.join(tmp, "archive.db")}'})
+        from app import create_app
+        app = create_app()
+        seed(app, argparse.Namespace(official_students=0, students=args.students, instructors=args.instructors,
+                                     messages=messages, seed=args.seed))
+
+        results = {}
+        with app.app_context():
+            for fmt in ('csv', 'jsonl'):
+                seconds, peak_mib, size = measure(lambda: sum(len(chunk) for chunk in export_messages(fmt)))
+                results[fmt] = {'seconds': seconds, 'peak_mib': peak_mib, 'bytes': size,
+                                'messages_per_second': round(messages / seconds) if seconds else None}
+            seconds, peak_mib, _ = measure(lambda: len(StudentMessage.query.all()))
+            results['.all()'] = {'seconds': seconds, 'peak_mib': peak_mib}
+            db.session.remove()
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='20000,200000', help='message counts, comma separated')
+    parser.add_argument('--students', type=int, default=2000)
+    parser.add_argument('--instructors', type=int, default=40)
+    parser.add_argument('--seed', type=int, default=14)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    results = {}
+    for size in (int(size) for size in args.sizes.split(',')):
+        result = results[size] = run_size(args, size)
+        print(f"{size:>9} messages  " + '  '.join(
+            f"{name} {r['seconds']}s peak {r['peak_mib']}MiB" for name, r in result.items()
+        ))
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'parameters': vars(args), 'sizes': results}, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""Per-message moderation cost and batch re-scan throughput.
+
+Times the compiled word list against checking each term one by one, then
+seeds a throwaway database and re-scans every saved message.
+
+Usage:
+    python benchmarks/moderation.py [--terms 2000] [--messages 50000] [--output moderation.json]
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from suite import seed
+
+
+def make_terms(rng, count):
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    terms = {''.join(rng.choices(letters, k=rng.randint(4, 10))) for _ in range(count)}
+    # A few phrases as well as single words
+    terms.update(f"{''.join(rng.choices(letters, k=5))} {''.join(rng.choices(letters, k=5))}" for _ in range(count // 20))
+    return sorted(terms)
+
+
+def make_messages(rng, count):
+    words = "happy valentines day thank you so much for being the best teacher ever".split()
+    return [' '.join(rng.choices(words, k=rng.randint(10, 80))) for _ in range(count)]
+
+
+def time_check(check, messages):
+    from profiling import percentile
+
+    timings = []
+    for text in messages:
+        start = time.perf_counter()
+        check(text)
+        timings.append((time.perf_counter() - start) * 1_000_000)
+    timings.sort()
+    return {'p50_us': percentile(timings, 0.50), 'p99_us': percentile(timings, 0.99)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--terms', type=int, default=2000)
+    parser.add_argument('--checks', type=int, default=500)
+    parser.add_argument('--students', type=int, default=500)
+    parser.add_argument('--instructors', type=int, default=40)
+    parser.add_argument('--messages', type=int, default=50000)
+    parser.add_argument('--seed', type=int, default=14)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    from moderation import Moderator, compile_terms, normalize, rescan_messages
+
+    rng = random.Random(args.seed)
+    terms = make_terms(rng, args.terms)
+    messages = make_messages(rng, args.checks)
+
+    start = time.perf_counter()
+    compiled = compile_terms(terms)
+    compile_ms = (time.perf_counter() - start) * 1000
+    term_patterns = [re.compile(rf'(?<!\w){re.escape(term)}(?!\w)') for term in terms]
+
+    def one_by_one(text):
+        text = normalize(text)
+        return any(pattern.search(text) for pattern in term_patterns)
+
+    results = {
+        'compile_ms': round(compile_ms, 2),
+        'one by one': time_check(one_by_one, messages),
+        'compiled': time_check(lambda text: compiled.search(normalize(text)), messages),
+    }
+    for name in ('one by one', 'compiled'):
+        print(f"{name:<12} p50 {results[name]['p50_us']:>9}us  p99 {results[name]['p99_us']:>9}us")
+    print(f"Compiled {len(terms)} terms in {compile_ms:.1f}ms")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['FLASK_SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{os.path.join(tmp, "moderation.db")}'
+        os.environ['FLASK_SQLALCHEMY_BINDS'] = json.dumps({'archive': f'sqlite:///{os.path.join(tmp, "archive.db")}'})
+        from app import create_app
+        app = create_app()
+        seed(app, argparse.Namespace(official_students=0, students=args.students, instructors=args.instructors,
+                                     messages=args.messages, seed=args.seed))
+
+        moderator = Moderator(os.path.join(tmp, 'moderation.txt'), reload_interval=60)
+        # "Synthetic" is in every seeded message, so the first pass holds all approved ones
+        moderator.set_terms(terms + ['synthetic'])
+        with app.app_context():
+            for label in ('rescan (all change)', 'rescan (none change)'):
+                start = time.perf_counter()
+                scanned, approved, held = rescan_messages(moderator)
+                seconds = time.perf_counter() - start
+                results[label] = {'scanned': scanned, 'approved': approved, 'held': held,
+                                  'seconds': round(seconds, 2), 'messages_per_second': round(scanned / seconds)}
+                print(f"{label:<21} {scanned} messages in {seconds:.2f}s "
+                      f"({scanned / seconds:.0f}/s, {held} held, {approved} approved)")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'parameters': vars(args), 'results': results}, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
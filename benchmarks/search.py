@@ -0,0 +1,149 @@
+"""Full-text message search (FTS5) against LIKE '%term%' scans.
+
+Seeds a throwaway database with messages drawn from a Zipf-distributed
+vocabulary, then times the same searches both ways, per instructor and across every
+inbox.
+
+Usage:
+    python benchmarks/search.py [--messages 100000] [--repeat 20] [--output search.json]
+"""
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from suite import seed
+
+# Word frequencies follow Zipf's law like real text: a few words are in
+# most messages, most words are rare
+VOCABULARY_SIZE = 20000
+COMMON_WORDS = (
+    "happy valentines day thank you so much for being the best teacher ever your class "
+    "made me love math science history coding every morning lesson patience kindness"
+).split()
+
+# Searches from rare (a few dozen messages) to common (most messages)
+TERMS = {'rare': 'w15000', 'uncommon': 'w900', 'two words': 'patience w120', 'prefix': 'w1234', 'common': 'thank'}
+
+
+def vocabulary():
+    words = COMMON_WORDS + [f'w{n}' for n in range(VOCABULARY_SIZE - len(COMMON_WORDS))]
+    cum_weights = list(itertools.accumulate(1 / rank for rank in range(1, len(words) + 1)))
+    return words, cum_weights
+
+
+def seed_messages(app, args):
+    """Insert synthetic message text; the FTS triggers index it as it goes"""
+    from sqlalchemy import insert
+    from extensions import db
+    from models import StudentMessage, manila_now, reconcile_message_counters
+
+    rng = random.Random(args.seed)
+    words, cum_weights = vocabulary()
+    data = seed(app, argparse.Namespace(
+        official_students=0, students=args.students, instructors=args.instructors, messages=0, seed=args.seed
+    ))
+    instructor_ids = [instructor_id for instructor_id, _ in data['instructors']]
+    instructor_weights = [1 / rank for rank in range(1, len(instructor_ids) + 1)]
+
+    with app.app_context():
+        now = manila_now()
+        start = time.perf_counter()
+        for offset in range(0, args.messages, 5000):
+            db.session.execute(insert(StudentMessage), [
+                {'student_id': rng.choice(data['student_ids']),
+                 'instructor_id': rng.choices(instructor_ids, instructor_weights)[0],
+                 'message': ' '.join(rng.choices(words, cum_weights=cum_weights, k=rng.randint(6, 30))).capitalize(),
+                 'is_approved': True,
+                 'created_at': now}
+                for _ in range(offset, min(offset + 5000, args.messages))
+            ])
+        db.session.commit()
+        insert_seconds = time.perf_counter() - start
+        reconcile_message_counters()
+    return instructor_ids[0], insert_seconds
+
+
+def like_search(text, instructor_id, limit):
+    from extensions import db
+    from models import StudentMessage
+
+    query = StudentMessage.query
+    for word in text.split():
+        query = query.filter(StudentMessage.message.like(f'%{word}%'))
+    if instructor_id is not None:
+        query = query.filter(StudentMessage.instructor_id == instructor_id)
+    return query.order_by(StudentMessage.created_at.desc()).limit(limit).all()
+
+
+def fts_search(text, instructor_id, limit):
+    from search import search_messages
+    results, _ = search_messages(text, instructor_id=instructor_id, limit=limit)
+    return results
+
+
+def time_search(search, text, instructor_id, repeat, limit):
+    from extensions import db
+    from profiling import percentile
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = len(search(text, instructor_id, limit))
+        timings.append((time.perf_counter() - start) * 1000)
+        db.session.remove()
+    timings.sort()
+    return {'p50_ms': percentile(timings, 0.50), 'p95_ms': percentile(timings, 0.95), 'results': count}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=100000)
+    parser.add_argument('--students', type=int, default=2000)
+    parser.add_argument('--instructors', type=int, default=40)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--seed', type=int, default=14)
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['FLASK_SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{os.path.join(tmp, "search.db")}'
+        os.environ['FLASK_SQLALCHEMY_BINDS'] = json.dumps({'archive': f'sqlite:///{os.path.join(tmp, "archive.db")}'})
+        from app import create_app
+        app = create_app()
+
+        print(f"Seeding {args.messages} messages...")
+        hot_instructor, insert_seconds = seed_messages(app, args)
+        print(f"Inserted (and indexed) in {insert_seconds:.1f}s")
+
+        results = {}
+        with app.app_context():
+            for scope, instructor_id in (('instructor', hot_instructor), ('global', None)):
+                for kind, text in TERMS.items():
+                    key = f'{scope}: {kind} ({text})'
+                    results[key] = {
+                        'like': time_search(like_search, text, instructor_id, args.repeat, args.limit),
+                        'fts': time_search(fts_search, text, instructor_id, args.repeat, args.limit),
+                    }
+                    like, fts = results[key]['like'], results[key]['fts']
+                    speedup = like['p50_ms'] / fts['p50_ms'] if fts['p50_ms'] else float('inf')
+                    print(f"{key:<40} LIKE p50 {like['p50_ms']:>8}ms  FTS p50 {fts['p50_ms']:>7}ms  "
+                          f"({speedup:.1f}x, {fts['results']} results)")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'parameters': vars(args), 'insert_seconds': round(insert_seconds, 2),
+                       'searches': results}, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""Read throughput on the instructor inbox while students are sending messages.
+
+Usage:
+    python benchmarks/sqlite_load.py [--seconds 10] [--readers 4] [--writers 2]
+
+Compare against SQLite's default rollback journal with:
+    FLASK_SQLITE_PRAGMAS__journal_mode=DELETE python benchmarks/sqlite_load.py
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def seed(db, models, students):
+    instructor = models.Instructor(name='Load Test', unique_code='LOADTEST', background_color='#ff4d6d')
+    db.session.add(instructor)
+    for i in range(students):
+        student = models.Student(student_id=f'LT-{i}', name=f'Student {i}', course='BSIT',
+                                 year='1st Year', email=f'lt{i}@example.com')
+        student.password_hash = '-'
+        db.session.add(student)
+    db.session.commit()
+    return instructor.id
+
+
+def run(app, seconds, readers, writers, students):
+    from extensions import db
+    import models
+
+    with app.app_context():
+        db.create_all()
+        instructor_id = seed(db, models, students)
+
+    stop = time.monotonic() + seconds
+    counts = {'reads': 0, 'writes': 0, 'read_errors': 0, 'write_errors': 0}
+    lock = threading.Lock()
+
+    def bump(key):
+        with lock:
+            counts[key] += 1
+
+    def reader():
+        client = app.test_client()
+        while time.monotonic() < stop:
+            response = client.get('/valentine/instructor/LOADTEST/messages')
+            bump('reads' if response.status_code == 200 else 'read_errors')
+
+    def writer(n):
+        client = app.test_client()
+        with client.session_transaction() as session:
+            session['student_id'] = n % students + 1
+        url = f'/valentine/student/instructor/{instructor_id}/send-message'
+        while time.monotonic() < stop:
+            response = client.post(url, data={'message': 'Happy Valentine\'s Day!'})
+            bump('writes' if response.status_code == 302 else 'write_errors')
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)]
+    threads += [threading.Thread(target=writer, args=(n,)) for n in range(writers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--readers', type=int, default=4)
+    parser.add_argument('--writers', type=int, default=2)
+    parser.add_argument('--students', type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['FLASK_SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{os.path.join(tmp, "load.db")}'
+        os.environ['FLASK_SQLALCHEMY_BINDS'] = json.dumps({'archive': f'sqlite:///{os.path.join(tmp, "archive.db")}'})
+        from app import create_app
+        app = create_app()
+
+        with app.app_context():
+            from extensions import db
+            journal_mode = db.session.execute(db.text('PRAGMA journal_mode')).scalar()
+
+        counts = run(app, args.seconds, args.readers, args.writers, args.students)
+
+    print(f"journal_mode={journal_mode} readers={args.readers} writers={args.writers} seconds={args.seconds}")
+    print(f"reads:  {counts['reads'] / args.seconds:8.1f}/s  ({counts['read_errors']} errors)")
+    print(f"writes: {counts['writes'] / args.seconds:8.1f}/s  ({counts['write_errors']} errors)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,134 @@
+"""Cold start time and memory of a worker, per role.
+
+Each run is a fresh Python process that imports app, calls create_app()
+and serves one request, the way a WSGI worker boots. Reports the import
+and create_app times, the first request, the peak RSS and whether the
+QR/imaging stack (qrcode, PIL) was loaded. The role's other pages are then
+fetched too, and a server error on any of them fails the run, so a role
+that can't serve its own pages doesn't get timed. Roles pick APP_BLUEPRINTS;
+--eager also turns on SCHEMA_UPGRADE_ON_START and QR_WARM_ON_START, to
+compare with doing that work on every boot.
+
+Usage:
+    python benchmarks/startup.py [--runs 5] [--roles all,student] [--eager] [--output startup.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Role -> (APP_BLUEPRINTS, URLs it serves; the first is the timed request)
+ROLES = {
+    'all': (['admin', 'instructor', 'student'],
+            ['/valentine/admin/', '/valentine/student/login', '/valentine/instructor/BENCH/messages']),
+    'student': (['student'], ['/valentine/student/login']),
+    'instructor': (['instructor'], ['/valentine/instructor/BENCH/messages', '/valentine/instructor/BENCH/messages/search?q=hello']),
+    'admin': (['admin', 'instructor'], ['/valentine/admin/', '/valentine/admin/metrics/passwords']),
+}
+
+# One instructor, so pages that list instructors render their rows
+SEED = """
+import sys
+sys.path.insert(0, ROOT)
+from app import create_app
+from extensions import db
+from models import Instructor
+with create_app().app_context():
+    db.session.add(Instructor(name='Startup Bench', unique_code='BENCH', background_color='#ff4d6d'))
+    db.session.commit()
+"""
+
+HEAVY_MODULES = ('qrcode', 'PIL')
+
+# Runs in the child process; prints one JSON line
+CHILD = """
+import json, resource, sys, time
+sys.path.insert(0, ROOT)
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+application = app.create_app()
+created = time.perf_counter()
+client = application.test_client()
+status = client.get(URLS[0]).status_code
+served = time.perf_counter()
+statuses = {url: client.get(url).status_code for url in URLS[1:]}
+statuses[URLS[0]] = status
+print(json.dumps({
+    'import_ms': (imported - start) * 1000,
+    'create_app_ms': (created - imported) * 1000,
+    'first_request_ms': (served - created) * 1000,
+    'status': status,
+    'errors': {url: code for url, code in statuses.items() if code >= 500},
+    'peak_rss_mib': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    'heavy_modules': [name for name in HEAVY_MODULES if name in sys.modules],
+}))
+"""
+
+
+def boot(role, env):
+    blueprints, urls = ROLES[role]
+    env = dict(env, FLASK_APP_BLUEPRINTS=json.dumps(blueprints))
+    code = f"ROOT = {ROOT!r}\nURLS = {urls!r}\nHEAVY_MODULES = {HEAVY_MODULES!r}\n" + CHILD
+    output = subprocess.run([sys.executable, '-c', code], env=env, cwd=ROOT,
+                            capture_output=True, text=True, check=True).stdout
+    run = json.loads(output.strip().splitlines()[-1])
+    if run['errors']:
+        raise SystemExit(f"{role}: server errors {run['errors']}")
+    return run
+
+
+def summarize(runs):
+    summary = {key: round(statistics.median(run[key] for run in runs), 1)
+               for key in ('import_ms', 'create_app_ms', 'first_request_ms', 'peak_rss_mib')}
+    summary['status'] = runs[-1]['status']
+    summary['heavy_modules'] = runs[-1]['heavy_modules']
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--roles', default=','.join(ROLES), help='comma separated: ' + ', '.join(ROLES))
+    parser.add_argument('--eager', action='store_true',
+                        help='upgrade the schema and warm the QR renderer on every boot')
+    parser.add_argument('--output')
+    args = parser.parse_args()
+
+    roles = [role.strip() for role in args.roles.split(',') if role.strip()]
+    for role in roles:
+        if role not in ROLES:
+            parser.error(f'unknown role {role!r} (choose from {", ".join(ROLES)})')
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, FLASK_SQLALCHEMY_DATABASE_URI=f'sqlite:///{os.path.join(tmp, "startup.db")}',
+                   FLASK_SQLALCHEMY_BINDS=json.dumps({'archive': f'sqlite:///{os.path.join(tmp, "archive.db")}'}))
+        if args.eager:
+            env.update(FLASK_SCHEMA_UPGRADE_ON_START='true', FLASK_QR_WARM_ON_START='true')
+
+        # The schema is created once, as "flask init-db" would at deploy time
+        subprocess.run([sys.executable, '-m', 'flask', '--app', 'app', 'init-db'],
+                       env=env, cwd=ROOT, capture_output=True, check=True)
+        subprocess.run([sys.executable, '-c', f"ROOT = {ROOT!r}\n" + SEED],
+                       env=env, cwd=ROOT, capture_output=True, check=True)
+
+        for role in roles:
+            result = results[role] = summarize([boot(role, env) for _ in range(args.runs)])
+            print(f"{role:<11} import {result['import_ms']:>7}ms  create_app {result['create_app_ms']:>7}ms  "
+                  f"first request {result['first_request_ms']:>7}ms ({result['status']})  "
+                  f"peak RSS {result['peak_rss_mib']:>6}MiB  heavy: {', '.join(result['heavy_modules']) or '-'}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'parameters': vars(args), 'roles': results}, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,280 @@
+"""Latency and throughput of the main student, instructor and admin pages.
+
+Seeds a throwaway database with synthetic data, drives the real routes
+through the Flask test client and writes the results as JSON so runs can be
+compared across commits.
+
+Usage:
+    python benchmarks/suite.py [--requests 200] [--concurrency 4] [--output results.json]
+    python benchmarks/suite.py --scenarios login,instructor_inbox
+    python benchmarks/suite.py --compare benchmarks/results/old.json benchmarks/results/new.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+PASSWORD = 'benchmark-password'
+STUDENT_URL = '/valentine/student'
+SCENARIOS = ('login', 'student_dashboard', 'send_message', 'instructor_inbox', 'admin_dashboard', 'qr_preview')
+
+
+def seed(app, args):
+    """Fill the database with a reproducible synthetic dataset"""
+    from sqlalchemy import insert
+    from extensions import db
+    from models import (Instructor, OfficialStudent, Student, StudentMessage, make_password_hash,
+                        manila_now, reconcile_message_counters)
+    import qr_render
+
+    rng = random.Random(args.seed)
+
+    with app.app_context():
+        db.create_all()
+
+        if args.official_students:
+            db.session.execute(insert(OfficialStudent), [
+                {'student_id': f'BM-{i:06d}', 'first_name': f'First{i}', 'last_name': f'Last{i}'}
+                for i in range(args.official_students)
+            ])
+
+        # Every student shares one password so hashing cost is paid only once here
+        password_hash = make_password_hash(PASSWORD, app.config['PASSWORD_HASH_METHOD'],
+                                           app.config['PASSWORD_SALT_LENGTH'])
+        db.session.execute(insert(Student), [
+            {'student_id': f'BM-{i:06d}', 'name': f'First{i} Last{i}', 'course': 'BSIT',
+             'year': '1st Year', 'email': f'bm{i}@example.com', 'password_hash': password_hash}
+            for i in range(args.students)
+        ])
+
+        instructors = []
+        for i in range(args.instructors):
+            code = f'BM{i:06d}'
+            instructor = Instructor(name=f'Instructor {i}', unique_code=code, background_color='#ff4d6d')
+            png, _, _ = qr_render.render_qr(f'http://localhost/valentine/instructor/{code}/messages')
+            instructor.set_qr_image(png)
+            instructors.append(instructor)
+        db.session.add_all(instructors)
+        db.session.commit()
+
+        # Skewed volume: the instructor ranked k gets a share proportional to 1/k
+        student_ids = [row[0] for row in db.session.query(Student.id)]
+        instructor_ids = [instructor.id for instructor in instructors]
+        weights = [1 / rank for rank in range(1, len(instructor_ids) + 1)]
+        now = manila_now()
+        for start in range(0, args.messages, 5000):
+            db.session.execute(insert(StudentMessage), [
+                {'student_id': rng.choice(student_ids),
+                 'instructor_id': rng.choices(instructor_ids, weights)[0],
+                 'message': f'Synthetic message {n}',
+                 'is_approved': rng.random() < 0.9,
+                 'created_at': now - timedelta(seconds=rng.randrange(30 * 24 * 3600))}
+                for n in range(start, min(start + 5000, args.messages))
+            ])
+        db.session.commit()
+        reconcile_message_counters()
+
+        return {'student_ids': student_ids, 'instructors': [(i.id, i.unique_code) for i in instructors]}
+
+
+def student_client(app, student_pk):
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['student_id'] = student_pk
+        session['student_name'] = 'Benchmark'
+    return client
+
+
+def scenario_request(name, app, data, rng):
+    """Build a function that makes one request and returns its status code"""
+    hot_id, hot_code = data['instructors'][0]
+
+    if name == 'login':
+        client = app.test_client()
+        def call():
+            n = rng.randrange(len(data['student_ids']))
+            return client.post(f'{STUDENT_URL}/login', data={'student_id': f'BM-{n:06d}', 'password': PASSWORD})
+        return call, 302
+
+    if name == 'student_dashboard':
+        client = student_client(app, rng.choice(data['student_ids']))
+        return lambda: client.get(f'{STUDENT_URL}/dashboard'), 200
+
+    if name == 'send_message':
+        client = student_client(app, rng.choice(data['student_ids']))
+        def call():
+            instructor_id = rng.choice(data['instructors'])[0]
+            return client.post(f'{STUDENT_URL}/instructor/{instructor_id}/send-message',
+                               data={'message': 'Happy Valentine\'s Day!'})
+        return call, 302
+
+    if name == 'instructor_inbox':
+        # The busiest instructor, as that is where the inbox is slowest
+        client = app.test_client()
+        return lambda: client.get(f'/valentine/instructor/{hot_code}/messages'), 200
+
+    if name == 'admin_dashboard':
+        client = app.test_client()
+        return lambda: client.get('/valentine/admin/'), 200
+
+    if name == 'qr_preview':
+        # Like the add-instructor form: one preview code, the name typed in bit by bit
+        client = app.test_client()
+        temp_code = ''.join(rng.choices('ABCDEFGHJKLMNPQRSTUVWXYZ23456789', k=8))
+        names = [f'Instructor {i}'[:n] for i in range(10) for n in range(1, 13)]
+        def call():
+            return client.post('/valentine/admin/generate-qr-preview',
+                               json={'name': rng.choice(names), 'temp_code': temp_code})
+        return call, 200
+
+    raise ValueError(f'Unknown scenario: {name}')
+
+
+def run_scenario(name, app, data, requests, concurrency, seed):
+    from profiling import percentile
+
+    per_thread = [requests // concurrency + (1 if n < requests % concurrency else 0) for n in range(concurrency)]
+    timings = []
+    errors = []
+    lock = threading.Lock()
+
+    def worker(n):
+        call, expected = scenario_request(name, app, data, random.Random(f'{seed}-{name}-{n}'))
+        local_timings, local_errors = [], 0
+        for _ in range(per_thread[n]):
+            start = time.perf_counter()
+            response = call()
+            local_timings.append((time.perf_counter() - start) * 1000)
+            if response.status_code != expected:
+                local_errors += 1
+        with lock:
+            timings.extend(local_timings)
+            errors.append(local_errors)
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    timings.sort()
+    return {
+        'requests': len(timings),
+        'errors': sum(errors),
+        'seconds': round(elapsed, 3),
+        'throughput_rps': round(len(timings) / elapsed, 1) if elapsed else None,
+        'p50_ms': percentile(timings, 0.50),
+        'p95_ms': percentile(timings, 0.95),
+        'p99_ms': percentile(timings, 0.99),
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(old_path, new_path):
+    """Print the p95 and throughput change per scenario between two result files"""
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+
+    print(f"{'scenario':<18} {'p95 old':>9} {'p95 new':>9} {'change':>8} {'rps old':>9} {'rps new':>9}")
+    for name, result in new['scenarios'].items():
+        before = old['scenarios'].get(name)
+        if not before:
+            continue
+        change = (result['p95_ms'] - before['p95_ms']) / before['p95_ms'] * 100 if before['p95_ms'] else 0
+        print(f"{name:<18} {before['p95_ms']:>9} {result['p95_ms']:>9} {change:>+7.1f}% "
+              f"{before['throughput_rps']:>9} {result['throughput_rps']:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--official-students', type=int, default=5000)
+    parser.add_argument('--students', type=int, default=1000)
+    parser.add_argument('--instructors', type=int, default=40)
+    parser.add_argument('--messages', type=int, default=50000)
+    parser.add_argument('--requests', type=int, default=200, help='requests per scenario')
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--seed', type=int, default=14)
+    parser.add_argument('--output', help='defaults to benchmarks/results/<timestamp>-<commit>.json')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'))
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    scenarios = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    for name in scenarios:
+        if name not in SCENARIOS:
+            parser.error(f'unknown scenario {name!r} (choose from {", ".join(SCENARIOS)})')
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ['FLASK_SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{os.path.join(tmp, "bench.db")}'
+        os.environ['FLASK_SQLALCHEMY_BINDS'] = json.dumps({'archive': f'sqlite:///{os.path.join(tmp, "archive.db")}'})
+        from app import create_app
+        app = create_app()
+
+        print(f"Seeding {args.students} students, {args.instructors} instructors, {args.messages} messages...")
+        started = time.perf_counter()
+        data = seed(app, args)
+        seed_seconds = time.perf_counter() - started
+
+        results = {}
+        for name in scenarios:
+            # The routes print debug lines; keep them out of the report
+            with contextlib.redirect_stdout(io.StringIO()):
+                results[name] = run_scenario(name, app, data, args.requests, args.concurrency, args.seed)
+            result = results[name]
+            print(f"{name:<18} {result['throughput_rps']:>8} req/s  p50 {result['p50_ms']:>8}ms  "
+                  f"p95 {result['p95_ms']:>8}ms  p99 {result['p99_ms']:>8}ms  ({result['errors']} errors)")
+
+        writer = app.extensions.get('message_writer')
+        if writer:
+            writer.stop()
+
+    commit = git_commit()
+    report = {
+        'commit': commit,
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'parameters': {key: value for key, value in vars(args).items() if key not in ('output', 'compare')},
+        'seed_seconds': round(seed_seconds, 2),
+        'scenarios': results,
+    }
+
+    output = args.output
+    if not output:
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        output = os.path.join(ROOT, 'benchmarks', 'results', f"{stamp}-{commit or 'unknown'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from flask import current_app
+
+
+class LRUCache:
+    """In-process cache: least recently used entries are dropped first.
+
+    Each worker process has its own copy; version keys live in FileVersions
+    so every worker sees a bump.
+    """
+
+    def __init__(self, max_entries=512):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires is not None and expires < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, timeout=None):
+        expires = time.monotonic() + timeout if timeout else None
+        with self.lock:
+            self.entries[key] = (value, expires)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def delete(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+
+class FileVersions:
+    """Version counters kept in small files, shared by every worker on the host.
+
+    Used with the in-process cache, whose own memory other workers can't
+    see. Reading one is a small file read, cheap enough for every request.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+
+    def path(self, key):
+        return os.path.join(self.directory, key.replace(':', '-'))
+
+    def get(self, key):
+        try:
+            with open(self.path(key)) as f:
+                return int(f.read() or 0)
+        except FileNotFoundError:
+            return None
+
+    def incr(self, key):
+        # Two workers bumping at once may both write the same number; either
+        # way it differs from the version entries were cached under
+        os.makedirs(self.directory, exist_ok=True)
+        version = (self.get(key) or 0) + 1
+        temporary = f'{self.path(key)}.{os.getpid()}.tmp'
+        with open(temporary, 'w') as f:
+            f.write(str(version))
+        os.replace(temporary, self.path(key))
+        return version
+
+
+class RedisCache:
+    """Cache shared by every worker through a Redis (or Redis-compatible) server"""
+
+    def __init__(self, url, prefix='valentine:'):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError('CACHE_BACKEND = "redis" requires the redis package')
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+
+    def get(self, key):
+        value = self.client.get(self.prefix + key)
+        return json.loads(value) if value is not None else None
+
+    def set(self, key, value, timeout=None):
+        self.client.set(self.prefix + key, json.dumps(value), ex=timeout or None)
+
+    def delete(self, key):
+        self.client.delete(self.prefix + key)
+
+    def incr(self, key):
+        return self.client.incr(self.prefix + key)
+
+
+class Cache:
+    """Small cache extension with version keys for group invalidation.
+
+    Cached values must be JSON-serializable so every backend can store them.
+    """
+
+    def init_app(self, app):
+        backend = app.config['CACHE_BACKEND']
+        if backend == 'lru':
+            app.extensions['cache'] = LRUCache(app.config['CACHE_MAX_ENTRIES'])
+            app.extensions['cache_versions'] = FileVersions(
+                os.path.join(app.instance_path, app.config['CACHE_VERSION_DIR'])
+            )
+        elif backend == 'redis':
+            app.extensions['cache'] = app.extensions['cache_versions'] = RedisCache(app.config['CACHE_REDIS_URL'])
+        else:
+            raise ValueError(f'Unknown CACHE_BACKEND: {backend}')
+
+    @property
+    def backend(self):
+        return current_app.extensions['cache']
+
+    @property
+    def versions(self):
+        return current_app.extensions['cache_versions']
+
+    def get(self, key):
+        return self.backend.get(key)
+
+    def set(self, key, value, timeout=None):
+        if timeout is None:
+            timeout = current_app.config['CACHE_DEFAULT_TIMEOUT']
+        self.backend.set(key, value, timeout)
+
+    def delete(self, key):
+        self.backend.delete(key)
+
+    def get_version(self, name):
+        """Current version of a group of cached entries"""
+        return self.versions.get(f'version:{name}') or 0
+
+    def bump_version(self, name):
+        """Invalidate every entry keyed on this version, in every worker"""
+        return self.versions.incr(f'version:{name}')
+
+    def get_or_set(self, key, build, timeout=None):
+        """Return the cached value for key, building and storing it on a miss"""
+        value = self.get(key)
+        if value is None:
+            value = build()
+            self.set(key, value, timeout)
+        return value
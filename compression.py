@@ -0,0 +1,67 @@
+import gzip
+from flask import request
+
+# Types worth compressing; images, PDFs and archives are already compressed
+COMPRESSIBLE_TYPES = {
+    'text/html', 'text/css', 'text/plain', 'text/csv', 'text/javascript',
+    'application/json', 'application/javascript', 'application/x-ndjson', 'image/svg+xml',
+}
+
+
+def load_brotli():
+    try:
+        import brotli
+    except ImportError:
+        return None
+    return brotli
+
+
+def init_compression(app):
+    """Compress responses and answer repeat GETs with 304 Not Modified.
+
+    Bodies are compressed with Brotli (if the brotli package is installed)
+    or gzip when the browser accepts it and the body is at least
+    COMPRESSION_MIN_SIZE bytes. Streamed responses such as the live inbox
+    and files sent with send_file are left alone.
+    """
+    brotli = load_brotli() if app.config['COMPRESSION_BROTLI'] else None
+    encodings = ['br', 'gzip'] if brotli else ['gzip']
+
+    @app.after_request
+    def compress_response(response):
+        if response.is_streamed or response.direct_passthrough or response.status_code != 200:
+            return response
+
+        # Weak ETag of the uncompressed body, so it matches whatever encoding was sent
+        if app.config['ETAGS_ENABLED'] and request.method in ('GET', 'HEAD') and 'ETag' not in response.headers:
+            response.add_etag(weak=True)
+            response.make_conditional(request)
+            if response.status_code == 304:
+                return response
+
+        if not app.config['COMPRESSION_ENABLED'] or 'Content-Encoding' in response.headers:
+            return response
+        if response.mimetype not in COMPRESSIBLE_TYPES:
+            return response
+
+        # Responses differ by encoding from here on, even when left uncompressed
+        response.vary.add('Accept-Encoding')
+        data = response.get_data()
+        if len(data) < app.config['COMPRESSION_MIN_SIZE']:
+            return response
+
+        encoding = request.accept_encodings.best_match(encodings)
+        if encoding == 'br':
+            compressed = brotli.compress(data, quality=app.config['COMPRESSION_BROTLI_QUALITY'])
+        elif encoding == 'gzip':
+            compressed = gzip.compress(data, compresslevel=app.config['COMPRESSION_GZIP_LEVEL'])
+        else:
+            return response
+
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        # A strong ETag would now be wrong for the other encodings
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
@@ -0,0 +1,134 @@
+class Config:
+    """Default settings. Any key can be overridden with a FLASK_ prefixed
+    environment variable, e.g. FLASK_SQLITE_PRAGMAS__busy_timeout=10000"""
+
+    # Use SQLite for PythonAnywhere deployment
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///valentine.db'
+    SQLALCHEMY_TRACK_MODIFICATIONS = False
+    # Messages from past seasons, moved out by "flask admin archive-messages"
+    SQLALCHEMY_BINDS = {'archive': 'sqlite:///valentine-archive.db'}
+    SECRET_KEY = 'valentine_secret'
+
+    # Applied to every new SQLite connection. WAL lets readers run while a
+    # message is being written, and busy_timeout makes writers wait for the
+    # lock instead of failing with "database is locked".
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': 5000,
+        'mmap_size': 268435456,  # 256 MB
+        'cache_size': -65536,  # 64 MB (negative values are KiB)
+    }
+
+    # Connection pool for file databases. Connections are reused so each
+    # keeps its page cache; SQLite still only allows one writer at a time.
+    SQLITE_POOL_SIZE = 10
+    SQLITE_MAX_OVERFLOW = 20
+    SQLITE_POOL_TIMEOUT = 30
+
+    # Write-behind mode for send_message: messages go on an in-process queue
+    # and a background thread commits them in batches. When the queue is
+    # full, students are asked to try again (HTTP 503).
+    MESSAGE_WRITE_BEHIND = False
+    MESSAGE_QUEUE_SIZE = 1000
+    MESSAGE_BATCH_SIZE = 100
+    MESSAGE_FLUSH_INTERVAL = 0.2  # seconds
+    # A batch that fails to commit (e.g. the database stayed locked past
+    # busy_timeout) is retried with doubling delays. After the last retry, or
+    # when the process stops, it is appended to a spool file (in this
+    # directory, inside the instance folder) that is replayed every
+    # MESSAGE_SPOOL_REPLAY_INTERVAL seconds and on start, so queued messages
+    # are never dropped.
+    MESSAGE_WRITE_RETRIES = 8
+    MESSAGE_RETRY_DELAY = 0.5  # seconds, doubled up to MESSAGE_RETRY_MAX_DELAY
+    MESSAGE_RETRY_MAX_DELAY = 30
+    MESSAGE_SPOOL_DIR = 'message-spool'
+    MESSAGE_SPOOL_REPLAY_INTERVAL = 60
+
+    # Cache for shared page fragments. "lru" keeps entries per process;
+    # use "redis" (with the redis package) to share them between workers.
+    # Entries expire after CACHE_DEFAULT_TIMEOUT seconds either way.
+    CACHE_BACKEND = 'lru'
+    CACHE_MAX_ENTRIES = 512
+    CACHE_DEFAULT_TIMEOUT = 300
+    # With "lru", invalidations (version bumps) are kept in files in this
+    # directory, inside the instance folder, so every worker sees them at once
+    CACHE_VERSION_DIR = 'cache-versions'
+    CACHE_REDIS_URL = 'redis://localhost:6379/0'
+
+    # Password hashing. Changing the method re-hashes each student's password
+    # the next time they log in.
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:600000'
+    PASSWORD_SALT_LENGTH = 16
+    # Hashes run on a worker pool so logins can't starve page rendering
+    PASSWORD_HASH_WORKERS = 4
+    PASSWORD_HASH_MAX_PENDING = 32
+
+    # Failed logins allowed per student ID / per IP within the window (seconds)
+    LOGIN_MAX_FAILURES = 5
+    LOGIN_MAX_FAILURES_PER_IP = 100
+    LOGIN_FAILURE_WINDOW = 300
+
+    # Live inbox (Server-Sent Events). A comment is sent every heartbeat
+    # seconds to keep the connection open, and streams end after the max so
+    # the worker is freed; browsers reconnect on their own.
+    LIVE_INBOX_HEARTBEAT = 15
+    LIVE_INBOX_MAX_SECONDS = 300
+
+    # Moderation: messages containing a word or phrase from this list (one
+    # per line; relative paths are inside the instance folder) are saved
+    # unapproved. Edits are picked up within the reload interval (seconds);
+    # run "flask admin rescan-messages" to apply them to saved messages.
+    MODERATION_WORDLIST = 'moderation.txt'
+    MODERATION_RELOAD_INTERVAL = 5
+
+    # Message analytics are kept in hourly rollups by database triggers.
+    # "flask admin catch-up-rollups" recounts this many recent hours from
+    # the messages themselves; run it as a scheduled task.
+    ANALYTICS_CATCHUP_HOURS = 24
+
+    # Season archiving. Messages are moved in batches of this many, one
+    # transaction each, so the site keeps working while it runs. With
+    # read-through on, instructors can browse their archived messages from
+    # the inbox.
+    ARCHIVE_BATCH_SIZE = 5000
+    ARCHIVE_READ_THROUGH = True
+
+    # Blueprints this process serves. A student-only worker can drop "admin"
+    # (and with it the QR and imaging stack). "admin" needs "instructor",
+    # whose QR images its pages show; create_app checks this.
+    APP_BLUEPRINTS = ('admin', 'instructor', 'student')
+
+    # Tables, columns and indexes are created by "flask init-db", run once
+    # per deploy. Turn this on to do it every time an app is created instead.
+    SCHEMA_UPGRADE_ON_START = False
+
+    # Processes used to render the bulk QR export (None = one per CPU)
+    QR_EXPORT_WORKERS = None
+    # Load qrcode, PIL and the overlay font when the admin blueprint is
+    # registered rather than on the first QR code drawn
+    QR_WARM_ON_START = False
+
+    # Minify and fingerprint static CSS/JS when the app starts. Turn off where
+    # the code is read-only and run "flask build-assets" at deploy time instead.
+    ASSETS_BUILD_ON_START = True
+
+    # Response compression. Brotli is used when the optional brotli package
+    # is installed; otherwise gzip. Bodies below the minimum size go out as is.
+    COMPRESSION_ENABLED = True
+    COMPRESSION_MIN_SIZE = 500
+    COMPRESSION_GZIP_LEVEL = 6
+    COMPRESSION_BROTLI = True
+    COMPRESSION_BROTLI_QUALITY = 5
+    # Weak ETags on GET responses so unchanged pages come back as 304
+    ETAGS_ENABLED = True
+
+    # Request profiling: per-endpoint wall/SQL/template timings, reported at
+    # /valentine/admin/metrics/requests. Off by default; when off nothing is
+    # hooked into requests at all.
+    PROFILING_ENABLED = False
+    PROFILING_SAMPLES = 1000
+    # Requests running more SQL statements than this are logged as warnings
+    PROFILING_QUERY_BUDGET = 20
+    # Also log one JSON line for every profiled request
+    PROFILING_LOG_REQUESTS = False
@@ -1,3 +1,81 @@
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, inspect
+from sqlalchemy.engine import make_url
+from sqlalchemy.schema import CreateColumn
+from cache import Cache
 
 db = SQLAlchemy()
+cache = Cache()
+
+
+def init_db(app):
+    """Set up SQLAlchemy with pool and PRAGMA settings tuned for SQLite"""
+    url = make_url(app.config['SQLALCHEMY_DATABASE_URI'])
+    is_sqlite = url.get_backend_name() == 'sqlite'
+
+    # In-memory databases use a single static connection, so only file
+    # databases get a pool
+    if is_sqlite and url.database not in (None, '', ':memory:'):
+        options = app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+        options.setdefault('pool_size', app.config['SQLITE_POOL_SIZE'])
+        options.setdefault('max_overflow', app.config['SQLITE_MAX_OVERFLOW'])
+        options.setdefault('pool_timeout', app.config['SQLITE_POOL_TIMEOUT'])
+
+    db.init_app(app)
+
+    pragmas = app.config.get('SQLITE_PRAGMAS') or {}
+    if not pragmas:
+        return
+
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+
+    # Bound databases (the message archive) get the same settings
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == 'sqlite':
+                event.listen(engine, 'connect', set_sqlite_pragmas)
+
+
+def add_missing_columns(connection, table, schema=None):
+    """ALTER TABLE in the columns of table that an existing database lacks.
+
+    schema names an ATTACHed database. Returns the names of the columns added.
+    """
+    name = f'{schema}.{table.name}' if schema else table.name
+    existing = {column['name'] for column in inspect(connection).get_columns(table.name, schema=schema)}
+    added = []
+    for column in table.columns:
+        if column.name not in existing:
+            ddl = CreateColumn(column).compile(dialect=connection.dialect)
+            connection.exec_driver_sql(f'ALTER TABLE {name} ADD COLUMN {ddl}')
+            added.append(column.name)
+    return added
+
+
+def upgrade_schema():
+    """Create missing tables, then add columns and indexes declared since an
+    existing table was created (create_all skips existing tables).
+
+    Covers every bind (the message archive too). Returns the names of
+    columns that were added, as "table.column", prefixed with the bind key
+    for bound databases.
+    """
+    db.create_all()
+
+    added = []
+    for bind_key, metadata in db.metadatas.items():
+        engine = db.engines[bind_key]
+        prefix = f'{bind_key}.' if bind_key else ''
+        with engine.begin() as connection:
+            for table in metadata.sorted_tables:
+                added += [f'{prefix}{table.name}.{column}' for column in add_missing_columns(connection, table)]
+
+        for table in metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(engine, checkfirst=True)
+
+    return added
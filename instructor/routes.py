@@ -1,37 +1,342 @@
-from flask import Blueprint, render_template, abort
-from models import Instructor, StudentMessage
+import base64
+import json
+import time
+from datetime import datetime
+from flask import Blueprint, render_template, abort, request, make_response, current_app, stream_with_context, jsonify
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import joinedload, undefer
+from models import ArchivedMessage, Instructor, InstructorQRCode, StudentMessage
+from extensions import db
+from pubsub import get_message_broker
+from search import search_messages, search_result_json
+from archive import attach_senders
+from message_export import export_messages, export_filename, parse_date_filter, EXPORT_FORMATS, EXPORT_MIMETYPES
 
 instructor_bp = Blueprint(
     "instructor",
     __name__,
-    template_folder="templates"
+    template_folder="templates",
+    static_folder="static"
 )
 
+# Number of messages shown per inbox page
+INBOX_PAGE_SIZE = 50
+
+# Cursor that sorts before every message, for live updates on an empty inbox
+START_CURSOR = f"{datetime.min.isoformat()}_0"
+
+# QR images never change for a given code, so browsers may keep them for a day
+QR_MAX_AGE = 86400
+
+
+def encode_cursor(message):
+    """Build a keyset cursor from the last message on a page"""
+    return f"{message.created_at.isoformat()}_{message.id}"
+
+
+def decode_cursor(cursor):
+    """Parse a cursor back into (created_at, id), or None if it is invalid"""
+    try:
+        created_at, message_id = cursor.rsplit("_", 1)
+        return datetime.fromisoformat(created_at), int(message_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+def inbox_page(instructor_id, before=None, limit=INBOX_PAGE_SIZE):
+    """Return one page of messages (newest first) with the sender loaded in the same query"""
+    # Messages held by moderation are only shown to the admin
+    query = StudentMessage.query\
+        .options(joinedload(StudentMessage.student))\
+        .filter(StudentMessage.instructor_id == instructor_id, StudentMessage.is_approved.is_(True))
+
+    if before:
+        created_at, message_id = before
+        # The plain "<=" lets SQLite seek the (instructor_id, created_at) index
+        query = query.filter(StudentMessage.created_at <= created_at, or_(
+            StudentMessage.created_at < created_at,
+            and_(StudentMessage.created_at == created_at, StudentMessage.id < message_id)
+        ))
+
+    # Fetch one extra row to know if there is an older page
+    rows = query\
+        .order_by(StudentMessage.created_at.desc(), StudentMessage.id.desc())\
+        .limit(limit + 1)\
+        .all()
+
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+def archived_page(instructor_id, before=None, limit=INBOX_PAGE_SIZE):
+    """Like inbox_page, for messages moved to the archive database"""
+    query = ArchivedMessage.query.filter(ArchivedMessage.instructor_id == instructor_id,
+                                         ArchivedMessage.is_approved.is_(True))
+
+    if before:
+        created_at, message_id = before
+        query = query.filter(ArchivedMessage.created_at <= created_at, or_(
+            ArchivedMessage.created_at < created_at,
+            and_(ArchivedMessage.created_at == created_at, ArchivedMessage.id < message_id)
+        ))
+
+    rows = query\
+        .order_by(ArchivedMessage.created_at.desc(), ArchivedMessage.id.desc())\
+        .limit(limit + 1)\
+        .all()
+
+    # Senders live in the main database, so they are loaded separately
+    attach_senders(rows[:limit])
+    next_cursor = encode_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return rows[:limit], next_cursor
+
+
+def messages_after(instructor_id, after_id, limit=INBOX_PAGE_SIZE):
+    """Messages saved after the given id, oldest first"""
+    # Only the id decides what is new: ids are handed out inside SQLite's
+    # single write transaction, so a message the write-behind queue saves
+    # late (with an older created_at) still gets a larger id. The
+    # (instructor_id, id) index makes this a seek even for a quiet inbox.
+    return StudentMessage.query\
+        .options(joinedload(StudentMessage.student))\
+        .filter(StudentMessage.instructor_id == instructor_id, StudentMessage.id > after_id,
+                StudentMessage.is_approved.is_(True))\
+        .order_by(StudentMessage.id)\
+        .limit(limit)\
+        .all()
+
 
 @instructor_bp.route("/<code>/messages")
 def messages(code):
-    """Inbox view - shows all messages from students"""
+    """Inbox view - shows messages from students, one page at a time"""
     instructor = Instructor.query.filter_by(unique_code=code).first()
-    
+
     if not instructor:
         abort(404)
-    
-    # Get all messages for this instructor with student info
-    messages = StudentMessage.query\
-        .filter_by(instructor_id=instructor.id)\
-        .order_by(StudentMessage.created_at.desc())\
-        .all()
-    
-    return render_template("messages.html", 
-                         instructor=instructor, 
-                         messages=messages)
+
+    # Search results replace the inbox, best match first
+    search = request.args.get("q", "").strip()
+    if search:
+        page = request.args.get("page", 1, type=int)
+        results, has_more = search_messages(search, instructor_id=instructor.id, page=page, approved_only=True)
+        return render_template("messages.html",
+                             instructor=instructor,
+                             messages=[message for message, _ in results],
+                             search=search,
+                             next_page=page + 1 if has_more else None)
+
+    before = decode_cursor(request.args.get("before"))
+    messages, next_cursor = inbox_page(instructor.id, before=before)
+
+    # Only the newest page listens for new messages. The stream goes by id
+    # (see messages_after) and the page by created_at, so start after the
+    # highest id shown: a message saved late can be newest by id without
+    # being first on the page.
+    live_cursor = None
+    if not before:
+        live_cursor = encode_cursor(max(messages, key=lambda m: m.id)) if messages else START_CURSOR
+
+    return render_template("messages.html",
+                         instructor=instructor,
+                         messages=messages,
+                         next_cursor=next_cursor,
+                         live_cursor=live_cursor)
+
+
+@instructor_bp.route("/<code>/messages/archive")
+def archived_messages(code):
+    """Messages from past seasons, read from the archive database on demand"""
+    instructor = Instructor.query.filter_by(unique_code=code).first()
+
+    if not instructor or not current_app.config["ARCHIVE_READ_THROUGH"]:
+        abort(404)
+
+    before = decode_cursor(request.args.get("before"))
+    messages, next_cursor = archived_page(instructor.id, before=before)
+    return render_template("messages.html",
+                         instructor=instructor,
+                         messages=messages,
+                         next_cursor=next_cursor,
+                         archive=True)
+
+
+@instructor_bp.route("/<code>/messages/archive/<int:message_id>")
+def view_archived_message(code, message_id):
+    """View one archived message"""
+    instructor = Instructor.query.filter_by(unique_code=code).first()
+
+    if not instructor or not current_app.config["ARCHIVE_READ_THROUGH"]:
+        abort(404)
+
+    message = db.session.get(ArchivedMessage, message_id)
+    if not message or message.instructor_id != instructor.id or not message.is_approved:
+        abort(404)
+    attach_senders([message])
+
+    return render_template("view_student_message.html",
+                         message=message,
+                         instructor=instructor)
+
+
+@instructor_bp.route("/<code>/messages/search")
+def search_inbox(code):
+    """Full-text search of one inbox, ranked, as JSON"""
+    instructor = Instructor.query.filter_by(unique_code=code).first()
+
+    if not instructor:
+        abort(404)
+
+    page = request.args.get("page", 1, type=int)
+    results, has_more = search_messages(request.args.get("q", ""), instructor_id=instructor.id, page=page,
+                                        approved_only=True)
+    return jsonify({
+        "results": [search_result_json(message, snippet) for message, snippet in results],
+        "next_page": page + 1 if has_more else None
+    })
+
+
+@instructor_bp.route("/<code>/messages/export.<fmt>")
+def export_inbox(code, fmt):
+    """Download this inbox as CSV or JSONL, oldest first (?since=&until= ISO dates)"""
+    instructor = Instructor.query.filter_by(unique_code=code).first()
+
+    if not instructor or fmt not in EXPORT_FORMATS:
+        abort(404)
+
+    try:
+        since = parse_date_filter(request.args.get("since"))
+        until = parse_date_filter(request.args.get("until"), end=True)
+    except ValueError:
+        abort(400, description="since and until must be ISO dates, e.g. 2026-02-14")
+
+    chunks = export_messages(fmt, instructor_id=instructor.id, since=since, until=until, approved_only=True)
+    response = current_app.response_class(stream_with_context(chunks), mimetype=EXPORT_MIMETYPES[fmt])
+    response.headers["Content-Disposition"] = f'attachment; filename="{export_filename(fmt, code)}"'
+    return response
+
+
+def inbox_event(instructor_id, after_id):
+    """Render messages newer than after_id as one SSE event, or None if there are none"""
+    new_messages = messages_after(instructor_id, after_id)
+    if not new_messages:
+        return None, after_id
+
+    counts = db.session.query(Instructor.approved_count, Instructor.sender_count)\
+        .filter(Instructor.id == instructor_id)\
+        .one()
+    data = json.dumps({
+        # Newest first, the same order as the page
+        "html": "".join(render_template("message_card.html", message=message)
+                        for message in reversed(new_messages)),
+        "message_count": counts.approved_count,
+        "sender_count": counts.sender_count
+    })
+    # The id comes back as Last-Event-ID when the browser reconnects
+    last = new_messages[-1]
+    return f"id: {encode_cursor(last)}\ndata: {data}\n\n", last.id
+
+
+@instructor_bp.route("/<code>/messages/stream")
+def messages_stream(code):
+    """Server-Sent Events stream of messages newer than the `after` cursor"""
+    instructor = Instructor.query.filter_by(unique_code=code).first()
+
+    if not instructor:
+        abort(404)
+
+    cursor = request.headers.get("Last-Event-ID") or request.args.get("after")
+    after = decode_cursor(cursor)
+    instructor_id = instructor.id
+    if after:
+        after_id = after[1]
+    else:
+        # Without a cursor, start from the newest message
+        after_id = db.session.query(db.func.max(StudentMessage.id))\
+            .filter(StudentMessage.instructor_id == instructor_id)\
+            .scalar() or 0
+
+    heartbeat = current_app.config["LIVE_INBOX_HEARTBEAT"]
+    deadline = time.monotonic() + current_app.config["LIVE_INBOX_MAX_SECONDS"]
+    broker = get_message_broker()
+
+    def generate():
+        nonlocal after_id
+        # Read the version first so a message sent during the query still wakes us
+        version = broker.version(instructor_id)
+        yield "retry: 3000\n\n"
+
+        while True:
+            sent = False
+            while True:
+                event, after_id = inbox_event(instructor_id, after_id)
+                if not event:
+                    break
+                sent = True
+                yield event
+            # Give the connection back to the pool while waiting
+            db.session.close()
+            if not sent:
+                yield ": keep-alive\n\n"
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            # On timeout, check the database anyway in case another
+            # process saved the message
+            version = broker.wait(instructor_id, version, min(heartbeat, remaining))
+
+    response = current_app.response_class(stream_with_context(generate()), mimetype="text/event-stream")
+    response.headers["Cache-Control"] = "no-cache"
+    # Stop nginx from buffering the stream
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
 
 
 @instructor_bp.route("/message/<int:message_id>")
 def view_student_message(message_id):
     """View a specific student message"""
     message = StudentMessage.query.get_or_404(message_id)
-    
-    return render_template("view_student_message.html", 
+    if not message.is_approved:
+        abort(404)
+
+    return render_template("view_student_message.html",
                          message=message,
-                         instructor=message.instructor)
\ No newline at end of file
+                         instructor=message.instructor)
+
+
+def load_qr_image(code):
+    """Find the stored QR image for a code, migrating a legacy base64 column on first read"""
+    qr_image = InstructorQRCode.query\
+        .join(Instructor)\
+        .filter(Instructor.unique_code == code)\
+        .first()
+    if qr_image:
+        return qr_image
+
+    instructor = Instructor.query\
+        .options(undefer(Instructor.qr_code))\
+        .filter_by(unique_code=code)\
+        .first()
+    if not instructor or not instructor.qr_code:
+        return None
+
+    instructor.set_qr_image(base64.b64decode(instructor.qr_code))
+    instructor.qr_code = None
+    db.session.commit()
+    return instructor.qr_image
+
+
+@instructor_bp.route("/<code>/qr.png")
+def qr_image(code):
+    """Serve an instructor's QR code as a cacheable PNG"""
+    qr_image = load_qr_image(code)
+
+    if not qr_image:
+        abort(404)
+
+    response = make_response(qr_image.image)
+    response.mimetype = "image/png"
+    response.set_etag(qr_image.etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = QR_MAX_AGE
+    return response.make_conditional(request)
@@ -0,0 +1,132 @@
+// Handle message click with envelope animation
+function handleMessageClick(element, url) {
+    // Check if message is already read
+    if (element.dataset.read === 'true') {
+        // If already read, navigate immediately
+        window.location.href = url;
+    } else {
+        // Add opened class to trigger animation
+        element.classList.add('opened');
+
+        // Update the data-read attribute
+        element.dataset.read = 'true';
+
+        // Navigate to the message after a brief delay for animation
+        setTimeout(() => {
+            window.location.href = url;
+        }, 500);
+    }
+}
+
+// Live updates: new messages are pushed over Server-Sent Events
+// instead of reloading the whole page
+const streamUrl = document.body.dataset.streamUrl;
+if (streamUrl && window.EventSource) {
+    const stream = new EventSource(streamUrl);
+
+    stream.onmessage = function(event) {
+        const data = JSON.parse(event.data);
+        let list = document.querySelector('.message-list');
+
+        // First message: swap the empty state for a list
+        if (!list) {
+            const emptyState = document.querySelector('.empty-state');
+            list = document.createElement('div');
+            list.className = 'message-list';
+            emptyState.parentNode.replaceChild(list, emptyState);
+        }
+
+        list.insertAdjacentHTML('afterbegin', data.html);
+        document.getElementById('message-count').textContent = data.message_count;
+        document.getElementById('sender-count').textContent = data.sender_count;
+        createConfetti();
+    };
+}
+
+// Floating Particles Generator (from your reference)
+function createParticles(containerId, isForeground = false) {
+    const particlesContainer = document.getElementById(containerId);
+
+    // Different colors and symbols
+    const symbols = [
+        { char: '❤️', class: 'heart-white' },
+        { char: '💖', class: 'heart-pink' },
+        { char: '💕', class: 'heart-yellow' },
+        { char: '💗', class: 'heart-white' },
+        { char: '🌸', class: 'flower' },
+        { char: '🌺', class: 'flower-pink' },
+        { char: '🌷', class: 'flower' },
+        { char: '🌹', class: 'flower-pink' },
+        { char: '🌼', class: 'heart-yellow' },
+        { char: '🌻', class: 'heart-yellow' }
+    ];
+
+    const particleCount = isForeground ? 15 : 20;
+
+    for (let i = 0; i < particleCount; i++) {
+        const particle = document.createElement('div');
+        const symbol = symbols[Math.floor(Math.random() * symbols.length)];
+
+        particle.className = isForeground ? 'particle-fg ' + symbol.class : 'particle-bg ' + symbol.class;
+        particle.innerHTML = symbol.char;
+
+        const left = Math.random() * 100;
+        const size = isForeground ? 14 + Math.random() * 25 : 10 + Math.random() * 20;
+        const duration = isForeground ? 15 + Math.random() * 20 : 20 + Math.random() * 25;
+        const delay = Math.random() * -30;
+        const rotation = Math.random() * 360;
+
+        particle.style.left = left + '%';
+        particle.style.fontSize = size + 'px';
+        particle.style.animationDuration = duration + 's';
+        particle.style.animationDelay = delay + 's';
+        particle.style.opacity = isForeground ? 0.5 + Math.random() * 0.3 : 0.2 + Math.random() * 0.3;
+        particle.style.transform = `rotate(${rotation}deg)`;
+
+        const startY = Math.random() * 100;
+        particle.style.top = startY + '%';
+
+        particlesContainer.appendChild(particle);
+    }
+}
+
+// Add confetti effect (from your reference)
+function createConfetti() {
+    for (let i = 0; i < 30; i++) {
+        setTimeout(() => {
+            const confetti = document.createElement('div');
+            confetti.className = 'confetti';
+            confetti.style.left = Math.random() * 100 + '%';
+            confetti.style.animationDuration = Math.random() * 2 + 2 + 's';
+            confetti.style.background = `hsl(${Math.random() * 360}, 70%, 60%)`;
+            document.body.appendChild(confetti);
+
+            setTimeout(() => confetti.remove(), 3000);
+        }, i * 50);
+    }
+}
+
+// Initialize on load
+window.addEventListener('load', function() {
+    // Create background particles
+    createParticles('particles-bg', false);
+
+    // Create foreground particles (in front of containers)
+    createParticles('particles-fg', true);
+
+    createConfetti();
+
+    // Create new particles periodically
+    setInterval(() => {
+        const particlesBg = document.getElementById('particles-bg');
+        const particlesFg = document.getElementById('particles-fg');
+
+        if (particlesBg.children.length < 20) {
+            createParticles('particles-bg', false);
+        }
+
+        if (particlesFg.children.length < 15) {
+            createParticles('particles-fg', true);
+        }
+    }, 8000);
+});
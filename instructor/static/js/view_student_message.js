@@ -0,0 +1,127 @@
+// Floating Particles Generator - Only Bottom to Top, Minimal Count
+function createParticles(containerId, isForeground = false) {
+    const particlesContainer = document.getElementById(containerId);
+
+    // Simplified symbols - just hearts, flowers, dogs, bees
+    const symbols = [
+        // Hearts
+        { char: '❤️', class: 'heart-red' },
+        { char: '💖', class: 'heart-pink' },
+        { char: '💗', class: 'heart-pink' },
+        { char: '💕', class: 'heart-pink' },
+        { char: '💘', class: 'heart-red' },
+        { char: '💝', class: 'heart-red' },
+
+        // Flowers
+        { char: '🌸', class: 'flower-pink' },
+        { char: '🌺', class: 'flower-pink' },
+        { char: '🌷', class: 'flower-pink' },
+        { char: '🌹', class: 'flower-pink' },
+
+        // Stars & Sparkles
+        { char: '✨', class: 'sparkle' },
+        { char: '⭐', class: 'star' },
+
+        // Dogs and Bees
+        { char: '🐶', class: 'heart-orange' },
+        { char: '🐕', class: 'heart-orange' },
+        { char: '🐝', class: 'heart-yellow' },
+
+        // Love symbols
+        { char: '💐', class: 'flower-pink' },
+        { char: '🎀', class: 'heart-pink' }
+    ];
+
+    // REDUCED particle count - much less!
+    const particleCount = isForeground ? 15 : 20; // Was 40:60, now 15:20
+
+    for (let i = 0; i < particleCount; i++) {
+        const particle = document.createElement('div');
+        const symbol = symbols[Math.floor(Math.random() * symbols.length)];
+
+        particle.className = (isForeground ? 'particle-fg ' : 'particle ') + symbol.class;
+        particle.innerHTML = symbol.char;
+
+        // Smaller sizes
+        const size = isForeground ? 10 + Math.random() * 14 : 8 + Math.random() * 12; // Even smaller
+        const left = Math.random() * 100;
+        const duration = 10 + Math.random() * 15; // 10-25 seconds
+        const delay = Math.random() * -15;
+
+        particle.style.left = left + '%';
+        particle.style.fontSize = size + 'px';
+        particle.style.animationDuration = duration + 's';
+        particle.style.animationDelay = delay + 's';
+        particle.style.opacity = isForeground ? 0.3 + Math.random() * 0.3 : 0.2 + Math.random() * 0.3;
+
+        particlesContainer.appendChild(particle);
+    }
+}
+
+// Add minimal confetti effect
+function createConfetti() {
+    // Reduced confetti count
+    for (let i = 0; i < 15; i++) { // Was 30, now 15
+        setTimeout(() => {
+            const confetti = document.createElement('div');
+            confetti.className = 'confetti';
+            confetti.style.left = Math.random() * 100 + '%';
+            confetti.style.animationDuration = Math.random() * 2 + 2 + 's';
+            confetti.style.animationDelay = Math.random() * 2 + 's';
+            confetti.style.background = `hsl(${Math.random() * 360}, 80%, 70%)`;
+            confetti.style.width = Math.random() * 6 + 2 + 'px';
+            confetti.style.height = Math.random() * 6 + 2 + 'px';
+            confetti.style.opacity = Math.random() * 0.6 + 0.2;
+            document.body.appendChild(confetti);
+
+            setTimeout(() => confetti.remove(), 5000);
+        }, i * 80);
+    }
+}
+
+// Initialize on load
+window.addEventListener('load', function() {
+    // Clear any existing particles
+    document.getElementById('particles-bg').innerHTML = '';
+    document.getElementById('particles-fg').innerHTML = '';
+
+    // Create minimal background particles (only bottom to top)
+    createParticles('particles-bg', false);
+
+    // Create minimal foreground particles (only bottom to top)
+    createParticles('particles-fg', true);
+
+    // Create minimal confetti
+    createConfetti();
+
+    // Occasionally add a new particle to keep it fresh but minimal
+    setInterval(() => {
+        const bgContainer = document.getElementById('particles-bg');
+        const fgContainer = document.getElementById('particles-fg');
+
+        // Only add if under threshold
+        if (bgContainer.children.length < 18) { // Keep under 18
+            const particle = document.createElement('div');
+            const symbols = ['❤️', '💖', '🌸', '🐝', '✨'];
+            const colors = ['heart-red', 'heart-pink', 'flower-pink', 'heart-yellow', 'sparkle'];
+            const randomSymbol = symbols[Math.floor(Math.random() * symbols.length)];
+            const randomColor = colors[Math.floor(Math.random() * colors.length)];
+
+            particle.className = 'particle ' + randomColor;
+            particle.innerHTML = randomSymbol;
+            particle.style.left = Math.random() * 100 + '%';
+            particle.style.fontSize = (8 + Math.random() * 10) + 'px';
+            particle.style.animationDuration = (10 + Math.random() * 12) + 's';
+            particle.style.animationDelay = '0s';
+            particle.style.opacity = 0.2 + Math.random() * 0.3;
+            bgContainer.appendChild(particle);
+
+            // Remove after animation
+            setTimeout(() => {
+                if (particle.parentNode) {
+                    particle.remove();
+                }
+            }, 22000);
+        }
+    }, 8000); // Add new particle every 8 seconds
+});
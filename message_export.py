@@ -0,0 +1,119 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+from sqlalchemy import select, tuple_
+from extensions import db
+from models import Instructor, Student, StudentMessage
+
+EXPORT_FORMATS = ('csv', 'jsonl')
+EXPORT_MIMETYPES = {'csv': 'text/csv', 'jsonl': 'application/x-ndjson'}
+
+# Messages read per query; each chunk is written out before the next is read
+EXPORT_CHUNK_SIZE = 1000
+
+EXPORT_COLUMNS = (
+    ('id', StudentMessage.id),
+    ('created_at', StudentMessage.created_at),
+    ('instructor_code', Instructor.unique_code),
+    ('instructor_name', Instructor.name),
+    ('student_id', Student.student_id),
+    ('student_name', Student.name),
+    ('student_course', Student.course),
+    ('student_year', Student.year),
+    ('message', StudentMessage.message),
+    ('is_approved', StudentMessage.is_approved),
+)
+
+
+def parse_date_filter(value, end=False):
+    """Parse a since/until filter: an ISO date or datetime, or None if empty.
+
+    A bare date used as the end of a range covers that whole day.
+    Raises ValueError for anything else.
+    """
+    if not value:
+        return None
+    parsed = datetime.fromisoformat(value)
+    if end and len(value) == 10:
+        parsed += timedelta(days=1)
+    return parsed
+
+
+def iter_message_chunks(instructor_id=None, since=None, until=None, chunk_size=EXPORT_CHUNK_SIZE,
+                        approved_only=False):
+    """Yield lists of message rows, oldest first, chunk_size at a time.
+
+    Each chunk is its own short query continuing after the last row of the
+    one before (keyset on created_at, id), so no read transaction is held
+    open while a slow client downloads, and memory stays at one chunk.
+    """
+    query = select(*(column.label(name) for name, column in EXPORT_COLUMNS))\
+        .join(Instructor, Instructor.id == StudentMessage.instructor_id)\
+        .join(Student, Student.id == StudentMessage.student_id)\
+        .order_by(StudentMessage.created_at, StudentMessage.id)\
+        .limit(chunk_size)
+    if instructor_id is not None:
+        query = query.where(StudentMessage.instructor_id == instructor_id)
+    if approved_only:
+        query = query.where(StudentMessage.is_approved.is_(True))
+    if since:
+        query = query.where(StudentMessage.created_at >= since)
+    if until:
+        query = query.where(StudentMessage.created_at < until)
+
+    after = None
+    while True:
+        page = query
+        if after:
+            page = page.where(tuple_(StudentMessage.created_at, StudentMessage.id) > after)
+        rows = db.session.execute(page).all()
+        db.session.close()
+        if not rows:
+            return
+        yield rows
+        if len(rows) < chunk_size:
+            return
+        after = (rows[-1].created_at, rows[-1].id)
+
+
+def csv_chunks(chunks):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([name for name, _ in EXPORT_COLUMNS])
+    for rows in chunks:
+        writer.writerows(
+            (row.id, row.created_at.isoformat(), *row[2:-1], int(bool(row.is_approved))) for row in rows
+        )
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    # Only the header is left if there were no messages
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')
+
+
+def jsonl_chunks(chunks):
+    names = [name for name, _ in EXPORT_COLUMNS]
+    encode = json.JSONEncoder(ensure_ascii=False).encode
+    for rows in chunks:
+        lines = []
+        for row in rows:
+            record = dict(zip(names, row))
+            record['created_at'] = row.created_at.isoformat()
+            record['is_approved'] = bool(row.is_approved)
+            lines.append(encode(record))
+        yield ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+def export_messages(fmt, instructor_id=None, since=None, until=None, chunk_size=EXPORT_CHUNK_SIZE,
+                    approved_only=False):
+    """Yield a CSV or JSONL export of messages (one inbox, or all of them) as byte chunks"""
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    chunks = iter_message_chunks(instructor_id, since, until, chunk_size, approved_only)
+    return csv_chunks(chunks) if fmt == 'csv' else jsonl_chunks(chunks)
+
+
+def export_filename(fmt, code=None):
+    return f"valentine-messages{'-' + code if code else ''}.{fmt}"
@@ -1,3 +1,8 @@
+import hashlib
+from functools import lru_cache
+from flask import current_app
+from sqlalchemy import event, func, select, exists
+from sqlalchemy.orm import Session, attributes, object_session
 from extensions import db
 from datetime import datetime, timezone, timedelta
 from flask_login import UserMixin
@@ -10,6 +15,16 @@ def manila_now():
     """Return current datetime in Manila timezone"""
     return datetime.now(MANILA_TZ).replace(tzinfo=None)
 
+
+def make_password_hash(password, method, salt_length):
+    return generate_password_hash(password, method=method, salt_length=salt_length)
+
+
+@lru_cache(maxsize=None)
+def hash_method_prefix(method):
+    """Method string werkzeug stores for a configured method (e.g. pbkdf2 -> pbkdf2:sha256:600000)"""
+    return generate_password_hash('', method=method, salt_length=1).split('$', 1)[0]
+
 class Instructor(db.Model):
     __tablename__ = "instructors"
 
@@ -18,12 +33,38 @@ class Instructor(db.Model):
     unique_code = db.Column(db.String(100), unique=True, nullable=False)
     message = db.Column(db.Text, nullable=True)
     background_color = db.Column(db.String(50))
-    qr_code = db.Column(db.Text, nullable=True)
+    # Legacy base64 PNG, kept deferred so list views never load it (see InstructorQRCode)
+    qr_code = db.deferred(db.Column(db.Text, nullable=True))
     is_message_added = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=manila_now)
     
+    # Inbox stats, kept up to date by the StudentMessage events below
+    message_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    approved_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    sender_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    
     # Relationship with student messages
     student_messages = db.relationship('StudentMessage', backref='instructor', lazy=True, cascade='all, delete-orphan')
+    
+    # QR code image, stored in its own table and served by instructor.qr_image
+    qr_image = db.relationship('InstructorQRCode', uselist=False, lazy=True, cascade='all, delete-orphan')
+    
+    def set_qr_image(self, png):
+        etag = hashlib.sha1(png).hexdigest()
+        if self.qr_image:
+            self.qr_image.image = png
+            self.qr_image.etag = etag
+        else:
+            self.qr_image = InstructorQRCode(image=png, etag=etag)
+
+
+class InstructorQRCode(db.Model):
+    __tablename__ = "instructor_qr_codes"
+    
+    instructor_id = db.Column(db.Integer, db.ForeignKey('instructors.id'), primary_key=True)
+    image = db.Column(db.LargeBinary, nullable=False)  # Raw PNG bytes
+    etag = db.Column(db.String(40), nullable=False)
+    created_at = db.Column(db.DateTime, default=manila_now)
 
 
 class Student(UserMixin, db.Model):
@@ -38,14 +79,25 @@ class Student(UserMixin, db.Model):
     password_hash = db.Column(db.String(200), nullable=False)
     created_at = db.Column(db.DateTime, default=manila_now)
     
+    # Sent message stats, kept up to date by the StudentMessage events below
+    sent_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    approved_sent_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    
     # Relationship with messages
     messages = db.relationship('StudentMessage', backref='student', lazy=True, cascade='all, delete-orphan')
     
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = make_password_hash(password,
+                                                current_app.config['PASSWORD_HASH_METHOD'],
+                                                current_app.config['PASSWORD_SALT_LENGTH'])
     
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
+    
+    def needs_rehash(self):
+        """Whether the stored hash was made with different parameters than configured"""
+        stored_method = self.password_hash.split('$', 1)[0]
+        return stored_method != hash_method_prefix(current_app.config['PASSWORD_HASH_METHOD'])
 
 
 class StudentMessage(db.Model):
@@ -56,7 +108,340 @@ class StudentMessage(db.Model):
     instructor_id = db.Column(db.Integer, db.ForeignKey('instructors.id'), nullable=False)
     message = db.Column(db.Text, nullable=False)
     is_approved = db.Column(db.Boolean, default=False)  # Admin can approve messages
+    # Released by the admin from the held list; moderation rescans leave it alone
+    is_reviewed = db.Column(db.Boolean, nullable=False, default=False, server_default='0')
     created_at = db.Column(db.DateTime, default=manila_now)
+    
+    # Inbox and "my messages" lists filter on one side and sort newest first.
+    # SQLite appends the rowid (id) to every index, so these also cover the
+    # (created_at, id) keyset order without a separate sort.
+    __table_args__ = (
+        db.Index('ix_student_messages_instructor_created', instructor_id, created_at),
+        db.Index('ix_student_messages_student_created', student_id, created_at),
+        # Live inbox: messages after a given id, for one instructor
+        db.Index('ix_student_messages_instructor_id', instructor_id, id),
+        # Messages held by moderation, for the admin's review list; partial,
+        # so it only holds the few held rows
+        db.Index('ix_student_messages_held', id, sqlite_where=is_approved.is_(False)),
+        # Time-window scans for the analytics catch-up; covering, so they
+        # never touch the table rows
+        db.Index('ix_student_messages_created', created_at, instructor_id, student_id),
+        # Ids are never handed out twice, even after the newest messages
+        # were archived (see archive.upgrade_message_ids for older databases)
+        {'sqlite_autoincrement': True},
+    )
+
+
+# Denormalized counters maintained below; reconcile_message_counters() rebuilds them
+COUNTER_COLUMNS = (
+    'instructors.message_count',
+    'instructors.approved_count',
+    'instructors.sender_count',
+    'students.sent_count',
+    'students.approved_sent_count',
+)
+
+
+def _has_other_message(connection, message, earlier_only=False):
+    """Whether the sender has another message to the same instructor"""
+    condition = StudentMessage.id < message.id if earlier_only else StudentMessage.id != message.id
+    query = select(exists().where(
+        StudentMessage.student_id == message.student_id,
+        StudentMessage.instructor_id == message.instructor_id,
+        condition
+    ))
+    return connection.execute(query).scalar()
+
+
+def _bump_counters(connection, message, messages, approved, senders):
+    instructors = Instructor.__table__
+    students = Student.__table__
+    connection.execute(
+        instructors.update()
+        .where(instructors.c.id == message.instructor_id)
+        .values(
+            message_count=instructors.c.message_count + messages,
+            approved_count=instructors.c.approved_count + approved,
+            sender_count=instructors.c.sender_count + senders
+        )
+    )
+    connection.execute(
+        students.update()
+        .where(students.c.id == message.student_id)
+        .values(
+            sent_count=students.c.sent_count + messages,
+            approved_sent_count=students.c.approved_sent_count + approved
+        )
+    )
+
+
+# These run inside the flush, so counters commit (or roll back) with the
+# message itself. ORM cascades from deleting an Instructor or Student also
+# go through them. Bulk insert()/update() statements do not; run
+# reconcile_message_counters() after those.
+#
+# A flush inserts or deletes rows in batches before these run, so a new
+# sender is one with no *earlier* message, and a sender is only removed
+# once per flush.
+@event.listens_for(StudentMessage, 'after_insert')
+def count_new_message(mapper, connection, message):
+    new_sender = 0 if _has_other_message(connection, message, earlier_only=True) else 1
+    _bump_counters(connection, message, 1, 1 if message.is_approved else 0, new_sender)
+
+
+@event.listens_for(StudentMessage, 'after_delete')
+def count_deleted_message(mapper, connection, message):
+    removed = object_session(message).info.setdefault('removed_senders', set())
+    pair = (message.student_id, message.instructor_id)
+    last_from_sender = 0
+    if pair not in removed and not _has_other_message(connection, message):
+        removed.add(pair)
+        last_from_sender = 1
+    _bump_counters(connection, message, -1, -1 if message.is_approved else 0, -last_from_sender)
+
+
+@event.listens_for(Session, 'after_flush_postexec')
+def reset_removed_senders(session, flush_context):
+    session.info.pop('removed_senders', None)
+
+
+@event.listens_for(StudentMessage, 'after_update')
+def count_approval_change(mapper, connection, message):
+    history = attributes.get_history(message, 'is_approved')
+    if not history.has_changes():
+        return
+    was_approved = bool(history.deleted and history.deleted[0])
+    if bool(message.is_approved) != was_approved:
+        _bump_counters(connection, message, 0, 1 if message.is_approved else -1, 0)
+
+
+def reconcile_message_counters():
+    """Recompute every denormalized message counter from student_messages"""
+    messages = StudentMessage.__table__
+    instructors = Instructor.__table__
+    students = Student.__table__
+
+    def per_instructor(column, *conditions):
+        return select(func.count(column))\
+            .where(messages.c.instructor_id == instructors.c.id, *conditions)\
+            .scalar_subquery()
+
+    def per_student(column, *conditions):
+        return select(func.count(column))\
+            .where(messages.c.student_id == students.c.id, *conditions)\
+            .scalar_subquery()
+
+    approved = messages.c.is_approved.is_(True)
+
+    db.session.execute(instructors.update().values(
+        message_count=per_instructor(messages.c.id),
+        approved_count=per_instructor(messages.c.id, approved),
+        sender_count=per_instructor(messages.c.student_id.distinct())
+    ))
+    db.session.execute(students.update().values(
+        sent_count=per_student(messages.c.id),
+        approved_sent_count=per_student(messages.c.id, approved)
+    ))
+    db.session.commit()
+
+
+# The FTS table stores its own copy of the message text and sender details,
+# with rowid = student_messages.id. Triggers keep it in step with every
+# write, including bulk inserts and the write-behind queue. instructor_id
+# is indexed too, so a search scoped to one inbox is matched by the index
+# instead of filtering every hit afterwards.
+SEARCH_DDL = (
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS student_messages_fts USING fts5(
+        message, sender_name, sender_course, instructor_id,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS student_messages_fts_insert AFTER INSERT ON student_messages BEGIN
+        INSERT INTO student_messages_fts (rowid, message, sender_name, sender_course, instructor_id)
+        SELECT new.id, new.message, students.name, students.course, new.instructor_id
+        FROM students WHERE students.id = new.student_id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS student_messages_fts_delete AFTER DELETE ON student_messages BEGIN
+        DELETE FROM student_messages_fts WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS student_messages_fts_update AFTER UPDATE OF message ON student_messages BEGIN
+        UPDATE student_messages_fts SET message = new.message WHERE rowid = new.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS students_fts_update AFTER UPDATE OF name, course ON students BEGIN
+        UPDATE student_messages_fts SET sender_name = new.name, sender_course = new.course
+        WHERE rowid IN (SELECT id FROM student_messages WHERE student_id = new.id);
+    END
+    """,
+)
+
+
+def _search_statements(dialect):
+    return SEARCH_DDL if dialect.name == 'sqlite' else ()
+
+
+@event.listens_for(db.metadata, 'after_create')
+def create_message_search(target, connection, **kw):
+    """Create the message search table and triggers (create_all skips them as they aren't models).
+
+    Existing messages are indexed the first time the table is created.
+    """
+    statements = _search_statements(connection.dialect)
+    if not statements:
+        return
+    exists = connection.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE name = 'student_messages_fts'"
+    ).first()
+    for statement in statements:
+        connection.exec_driver_sql(statement)
+    if not exists:
+        rebuild_message_search(connection)
+
+
+@event.listens_for(db.metadata, 'before_drop')
+def drop_message_search(target, connection, **kw):
+    if _search_statements(connection.dialect):
+        connection.exec_driver_sql("DROP TABLE IF EXISTS student_messages_fts")
+
+
+def rebuild_message_search(connection):
+    """Re-index every message from scratch"""
+    connection.exec_driver_sql("DELETE FROM student_messages_fts")
+    connection.exec_driver_sql("""
+        INSERT INTO student_messages_fts (rowid, message, sender_name, sender_course, instructor_id)
+        SELECT student_messages.id, student_messages.message, students.name, students.course,
+               student_messages.instructor_id
+        FROM student_messages JOIN students ON students.id = student_messages.student_id
+    """)
+    # Merge the index segments written by the bulk insert
+    connection.exec_driver_sql("INSERT INTO student_messages_fts (student_messages_fts) VALUES ('optimize')")
+
+
+class MessageRollup(db.Model):
+    """Messages per hour, broken down by one dimension (instructor, course, year or total)"""
+    __tablename__ = 'message_rollups'
+
+    dimension = db.Column(db.String(20), primary_key=True)
+    label = db.Column(db.String(100), primary_key=True)  # instructor id, course or year; '' for total
+    hour = db.Column(db.String(13), primary_key=True)  # 'YYYY-MM-DD HH', Manila time
+    message_count = db.Column(db.Integer, nullable=False, default=0)
+
+
+# Label per rollup dimension, as SQL over a message row {m} and its student
+ROLLUP_LABELS = (
+    ('total', "''"),
+    ('instructor', 'CAST({m}.instructor_id AS TEXT)'),
+    ('course', 'students.course'),
+    ('year', 'students.year'),
+)
+ROLLUP_HOUR = "strftime('%Y-%m-%d %H', {m}.created_at)"
+
+
+def _rollup_trigger(name, event_name, row, change):
+    rows = '\n        UNION ALL '.join(
+        f"SELECT '{dimension}', {label.format(m=row)}, {ROLLUP_HOUR.format(m=row)}, {change} "
+        f"FROM students WHERE students.id = {row}.student_id"
+        for dimension, label in ROLLUP_LABELS
+    )
+    return f"""
+    CREATE TRIGGER IF NOT EXISTS {name} AFTER {event_name} ON student_messages BEGIN
+        INSERT INTO message_rollups (dimension, label, hour, message_count)
+        {rows}
+        ON CONFLICT (dimension, label, hour) DO UPDATE SET message_count = message_count + excluded.message_count;
+    END
+    """
+
+
+# Triggers count every message written or deleted, bulk inserts and the
+# write-behind queue included, in the same transaction. They don't follow
+# a student changing course or year; catch_up_rollups() recounts recent
+# hours from the messages for that.
+ROLLUP_DDL = (
+    _rollup_trigger('message_rollups_insert', 'INSERT', 'new', 1),
+    _rollup_trigger('message_rollups_delete', 'DELETE', 'old', -1),
+)
+
+
+@event.listens_for(db.metadata, 'after_create')
+def create_message_rollups(target, connection, **kw):
+    """Create the rollup triggers; rollups are counted from scratch the first time"""
+    if connection.dialect.name != 'sqlite':
+        return
+    exists = connection.exec_driver_sql(
+        "SELECT 1 FROM sqlite_master WHERE name = 'message_rollups_insert'"
+    ).first()
+    for statement in ROLLUP_DDL:
+        connection.exec_driver_sql(statement)
+    if not exists:
+        rebuild_message_rollups(connection)
+
+
+def _rollup_counts(where, source='student_messages'):
+    """SELECT of rollup rows counting the messages (aliased m) in `source` that match `where`"""
+    return '\n        UNION ALL '.join(
+        f"SELECT '{dimension}', {label.format(m='m')}, {ROLLUP_HOUR.format(m='m')}, count(*) "
+        f"FROM {source} AS m JOIN students ON students.id = m.student_id "
+        f"WHERE {where} GROUP BY 2, 3"
+        for dimension, label in ROLLUP_LABELS
+    )
+
+
+def rebuild_message_rollups(connection, since=None, source='student_messages'):
+    """Recount the rollups for every hour from `since` (a datetime; None for all of them).
+
+    `source` is the table (or subquery) of messages to count; pass one that
+    includes archived messages, or their hours are left at zero.
+    """
+    hour = since.strftime('%Y-%m-%d %H') if since else ''
+    start = since.strftime('%Y-%m-%d %H:00:00') if since else ''
+    connection.exec_driver_sql("DELETE FROM message_rollups WHERE hour >= ?", (hour,))
+    connection.exec_driver_sql(
+        f"INSERT INTO message_rollups (dimension, label, hour, message_count) "
+        f"{_rollup_counts('m.created_at >= ?', source)}",
+        (start,) * len(ROLLUP_LABELS)
+    )
+
+
+def add_message_rollups(connection, where):
+    """Count the messages matching `where` (SQL over alias m) into the rollups a second time.
+
+    Used before deleting messages that should stay counted, as the delete
+    trigger takes them out again.
+    """
+    connection.exec_driver_sql(
+        f"INSERT INTO message_rollups (dimension, label, hour, message_count) {_rollup_counts(where)} "
+        f"ON CONFLICT (dimension, label, hour) DO UPDATE SET message_count = message_count + excluded.message_count"
+    )
+
+
+class ArchivedMessage(db.Model):
+    """A message from a past season, moved to the archive database by "flask admin archive-messages".
+
+    Same columns as student_messages. Students and instructors stay in the
+    live database, so there are no relationships; load senders separately.
+    """
+    __bind_key__ = 'archive'
+    __tablename__ = 'student_messages'
+
+    id = db.Column(db.Integer, primary_key=True)
+    student_id = db.Column(db.Integer, nullable=False)
+    instructor_id = db.Column(db.Integer, nullable=False)
+    message = db.Column(db.Text, nullable=False)
+    is_approved = db.Column(db.Boolean, default=False)
+    is_reviewed = db.Column(db.Boolean, nullable=False, default=False, server_default='0')
+    created_at = db.Column(db.DateTime)
+
+    __table_args__ = (
+        db.Index('ix_archived_messages_instructor_created', instructor_id, created_at),
+    )
 
 
 class OfficialStudent(db.Model):
@@ -68,5 +453,11 @@ class OfficialStudent(db.Model):
     last_name = db.Column(db.String(100), nullable=False)
     created_at = db.Column(db.DateTime, default=manila_now)
     
+    # NOCASE indexes so the roster's case-insensitive prefix search (LIKE 'abc%') can use them
+    __table_args__ = (
+        db.Index('ix_official_students_student_id_nocase', student_id.collate('NOCASE')),
+        db.Index('ix_official_students_last_name_nocase', last_name.collate('NOCASE')),
+    )
+    
     def __repr__(self):
         return f'<OfficialStudent {self.student_id}: {self.first_name} {self.last_name}>'
\ No newline at end of file
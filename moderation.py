@@ -0,0 +1,177 @@
+import os
+import re
+import threading
+import time
+import unicodedata
+from flask import current_app
+from sqlalchemy import select, update
+from extensions import db
+from models import StudentMessage, reconcile_message_counters
+
+# Messages read per round trip by rescan_messages()
+RESCAN_CHUNK_SIZE = 1000
+
+# Marks the end of a term in the trie
+END = ''
+
+
+def normalize(text):
+    """Casefold and drop accents so "Stüpid" and "STUPID" match "stupid" """
+    decomposed = unicodedata.normalize('NFKD', text or '').casefold()
+    return ''.join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def _trie_pattern(node):
+    branches = []
+    for char, child in sorted((char, child) for char, child in node.items() if char != END):
+        # Words inside a phrase may be split by any run of non-word characters
+        branches.append((r'\W+' if char == ' ' else re.escape(char)) + _trie_pattern(child))
+    if not branches:
+        return ''
+    pattern = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+    if END in node:
+        pattern = f'(?:{pattern})?'
+    return pattern
+
+
+def compile_terms(terms):
+    """Compile words and phrases into one regex shaped like a trie.
+
+    Terms sharing a prefix share a branch, so each position in a message
+    is tried against the trie once instead of against every term. Terms
+    only match whole words. Returns None when there are no terms.
+    """
+    trie = {}
+    for term in terms:
+        term = ' '.join(normalize(term).split())
+        if not term:
+            continue
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[END] = True
+    if not trie:
+        return None
+    return re.compile(rf'(?<!\w){_trie_pattern(trie)}(?!\w)')
+
+
+def read_terms(path):
+    """One word or phrase per line; blank lines and lines starting with # are skipped"""
+    try:
+        with open(path, encoding='utf-8') as f:
+            lines = [line.strip() for line in f]
+    except FileNotFoundError:
+        return []
+    return [line for line in lines if line and not line.startswith('#')]
+
+
+class Moderator:
+    """Holds back messages containing a listed word or phrase.
+
+    The list lives in a text file and is compiled once per change. Every
+    process checks the file's modification time at most once per
+    reload_interval, so an edited list is picked up without a restart.
+    """
+
+    def __init__(self, path, reload_interval):
+        self.path = path
+        self.reload_interval = reload_interval
+        self.lock = threading.Lock()
+        self.terms = []
+        self.pattern = None
+        self.mtime = None
+        self.checked_at = 0
+        self.reload()
+
+    def reload(self):
+        """Recompile the list if the file changed; returns True if it was recompiled"""
+        with self.lock:
+            self.checked_at = time.monotonic()
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except FileNotFoundError:
+                mtime = None
+            if mtime == self.mtime:
+                return False
+            terms = read_terms(self.path)
+            # Swap both at once; readers take the pattern without the lock
+            self.pattern, self.terms, self.mtime = compile_terms(terms), terms, mtime
+            return True
+
+    def set_terms(self, terms):
+        """Replace the list on disk and recompile it"""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        temp_path = f'{self.path}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.writelines(f"{' '.join(term.split())}\n" for term in terms if term.strip())
+        os.replace(temp_path, self.path)
+        self.reload()
+
+    def match(self, text):
+        """The first listed word or phrase in text, or None"""
+        if time.monotonic() - self.checked_at >= self.reload_interval:
+            self.reload()
+        pattern = self.pattern
+        if pattern is None:
+            return None
+        found = pattern.search(normalize(text))
+        return found.group() if found else None
+
+    def allows(self, text):
+        return self.match(text) is None
+
+
+def rescan_messages(moderator, chunk_size=RESCAN_CHUNK_SIZE):
+    """Re-check every saved message against the current list.
+
+    Messages the admin has released (is_reviewed) keep their approval.
+
+    Messages are streamed chunk by chunk, changed approvals are written
+    with one UPDATE per chunk, and the message counters are rebuilt at the
+    end. Returns (scanned, approved, held) where the last two count the
+    messages whose approval changed.
+    """
+    moderator.reload()
+    rows = db.session.execute(
+        select(StudentMessage.id, StudentMessage.message, StudentMessage.is_approved)
+        .where(StudentMessage.is_reviewed.is_(False))
+        .order_by(StudentMessage.id)
+        .execution_options(yield_per=chunk_size)
+    )
+
+    scanned = 0
+    to_approve, to_hold = [], []
+    for chunk in rows.partitions():
+        scanned += len(chunk)
+        for message_id, text, is_approved in chunk:
+            allowed = moderator.allows(text)
+            if allowed != bool(is_approved):
+                (to_approve if allowed else to_hold).append(message_id)
+
+    # The rows are only written once the read cursor is done with them
+    for ids, approved in ((to_approve, True), (to_hold, False)):
+        for start in range(0, len(ids), chunk_size):
+            db.session.execute(
+                update(StudentMessage)
+                .where(StudentMessage.id.in_(ids[start:start + chunk_size]))
+                .values(is_approved=approved)
+                .execution_options(synchronize_session=False)
+            )
+    db.session.commit()
+
+    # Bulk updates skip the per-row counter hooks
+    if to_approve or to_hold:
+        reconcile_message_counters()
+    return scanned, len(to_approve), len(to_hold)
+
+
+def init_moderation(app):
+    path = app.config['MODERATION_WORDLIST']
+    app.extensions['moderator'] = Moderator(
+        os.path.join(app.instance_path, path),
+        reload_interval=app.config['MODERATION_RELOAD_INTERVAL']
+    )
+
+
+def get_moderator():
+    return current_app.extensions['moderator']
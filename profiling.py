@@ -0,0 +1,153 @@
+import json
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+from flask import before_render_template, current_app, g, has_request_context, request, template_rendered
+from sqlalchemy import event
+from extensions import db
+
+logger = logging.getLogger('valentine.profiling')
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list (None if empty)"""
+    if not sorted_values:
+        return None
+    return round(sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p))], 2)
+
+
+class RequestProfiler:
+    """Per-endpoint wall time, template time and SQL statistics.
+
+    Only the last PROFILING_SAMPLES requests per endpoint are kept, so
+    percentiles reflect recent traffic.
+    """
+
+    def __init__(self, samples, query_budget):
+        self.query_budget = query_budget
+        self.samples = defaultdict(lambda: deque(maxlen=samples))
+        self.over_budget = defaultdict(int)
+        self.lock = threading.Lock()
+
+    def record(self, endpoint, profile):
+        with self.lock:
+            self.samples[endpoint].append(profile)
+            if profile['sql_count'] > self.query_budget:
+                self.over_budget[endpoint] += 1
+
+    def summary(self):
+        with self.lock:
+            samples = {endpoint: list(values) for endpoint, values in self.samples.items()}
+            over_budget = dict(self.over_budget)
+
+        summary = {}
+        for endpoint, profiles in sorted(samples.items()):
+            wall = sorted(p['wall_ms'] for p in profiles)
+            sql = sorted(p['sql_ms'] for p in profiles)
+            templates = sorted(p['template_ms'] for p in profiles)
+            counts = [p['sql_count'] for p in profiles]
+            summary[endpoint] = {
+                'requests': len(profiles),
+                'wall_ms': {'p50': percentile(wall, 0.50), 'p95': percentile(wall, 0.95), 'p99': percentile(wall, 0.99)},
+                'sql_ms': {'p50': percentile(sql, 0.50), 'p95': percentile(sql, 0.95)},
+                'template_ms': {'p50': percentile(templates, 0.50), 'p95': percentile(templates, 0.95)},
+                'sql_count': {'mean': round(sum(counts) / len(counts), 1), 'max': max(counts)},
+                'over_budget': over_budget.get(endpoint, 0),
+            }
+        return summary
+
+
+def _current_profile():
+    if has_request_context():
+        return g.get('profile')
+    return None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_profile() is not None:
+        conn.info.setdefault('query_start', []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _current_profile()
+    if profile is not None and conn.info.get('query_start'):
+        profile['sql_ms'] += (time.perf_counter() - conn.info['query_start'].pop()) * 1000
+        profile['sql_count'] += 1
+
+
+def _before_render(sender, template, context, **extra):
+    profile = _current_profile()
+    if profile is not None:
+        profile['_templates'].append(time.perf_counter())
+
+
+def _after_render(sender, template, context, **extra):
+    profile = _current_profile()
+    if profile is not None and profile['_templates']:
+        started = profile['_templates'].pop()
+        # Only count the outermost render so nested templates aren't added twice
+        if not profile['_templates']:
+            profile['template_ms'] += (time.perf_counter() - started) * 1000
+
+
+def init_profiling(app):
+    """Turn on request profiling if PROFILING_ENABLED is set.
+
+    Nothing is registered when it is off, so there is no per-request cost.
+    """
+    if not app.config.get('PROFILING_ENABLED'):
+        return
+
+    profiler = RequestProfiler(app.config['PROFILING_SAMPLES'], app.config['PROFILING_QUERY_BUDGET'])
+    app.extensions['profiler'] = profiler
+
+    with app.app_context():
+        event.listen(db.engine, 'before_cursor_execute', _before_cursor_execute)
+        event.listen(db.engine, 'after_cursor_execute', _after_cursor_execute)
+    before_render_template.connect(_before_render, app)
+    template_rendered.connect(_after_render, app)
+
+    @app.before_request
+    def start_profile():
+        g.profile = {
+            'start': time.perf_counter(),
+            'sql_count': 0,
+            'sql_ms': 0.0,
+            'template_ms': 0.0,
+            '_templates': [],
+        }
+
+    @app.after_request
+    def finish_profile(response):
+        profile = g.pop('profile', None)
+        endpoint = request.endpoint
+        if profile is None or endpoint is None or endpoint.split('.')[-1] == 'static':
+            return response
+
+        result = {
+            'wall_ms': round((time.perf_counter() - profile['start']) * 1000, 2),
+            'sql_count': profile['sql_count'],
+            'sql_ms': round(profile['sql_ms'], 2),
+            'template_ms': round(profile['template_ms'], 2),
+        }
+        profiler.record(endpoint, result)
+
+        # Added alongside any Server-Timing the view set itself
+        response.headers.add('Server-Timing', (
+            f"app;dur={result['wall_ms']}, "
+            f"db;dur={result['sql_ms']};desc=\"{result['sql_count']} queries\", "
+            f"tpl;dur={result['template_ms']}"
+        ))
+
+        line = json.dumps(dict(result, endpoint=endpoint, method=request.method, status=response.status_code))
+        if result['sql_count'] > profiler.query_budget:
+            logger.warning(f"query budget exceeded: {line}")
+        elif app.config['PROFILING_LOG_REQUESTS']:
+            logger.info(line)
+        return response
+
+
+def get_profiler():
+    """The current app's RequestProfiler, or None when profiling is off"""
+    return current_app.extensions.get('profiler')
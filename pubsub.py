@@ -0,0 +1,50 @@
+import threading
+from flask import current_app
+
+
+class MessageBroker:
+    """In-process notifications that an instructor has new messages.
+
+    Publishers only bump a per-instructor version number; subscribers wait
+    for it to change and then read the new rows from the database, so a
+    missed or merged notification never loses a message. Only dashboards
+    served by the same process are woken up; others pick new messages up
+    on their next heartbeat.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.conditions = {}
+        self.versions = {}
+
+    def _condition(self, instructor_id):
+        condition = self.conditions.get(instructor_id)
+        if condition is None:
+            condition = self.conditions[instructor_id] = threading.Condition(self.lock)
+        return condition
+
+    def version(self, instructor_id):
+        with self.lock:
+            return self.versions.get(instructor_id, 0)
+
+    def publish(self, instructor_id):
+        """Wake up everyone waiting on this instructor's inbox"""
+        with self.lock:
+            self.versions[instructor_id] = self.versions.get(instructor_id, 0) + 1
+            self._condition(instructor_id).notify_all()
+
+    def wait(self, instructor_id, seen, timeout):
+        """Block until the version moves past `seen` or the timeout passes; returns the version"""
+        with self.lock:
+            self._condition(instructor_id).wait_for(
+                lambda: self.versions.get(instructor_id, 0) != seen, timeout
+            )
+            return self.versions.get(instructor_id, 0)
+
+
+def init_message_broker(app):
+    app.extensions['message_broker'] = MessageBroker()
+
+
+def get_message_broker():
+    return current_app.extensions['message_broker']
@@ -0,0 +1,161 @@
+import time
+from functools import lru_cache
+from io import BytesIO
+
+import qrcode
+from PIL import Image, ImageDraw, ImageFont
+
+# Number of rendered PNGs kept in memory per process
+QR_CACHE_SIZE = 256
+
+# Font used for the name overlay, tried in order before PIL's built-in font
+FONT_SIZE = 20
+FONT_CANDIDATES = ("arial.ttf", "DejaVuSans.ttf")
+
+# Valentine pink used for the overlay text and border
+OVERLAY_COLOR = '#ff4d6d'
+
+# Height of the name strip under "label" codes
+LABEL_HEIGHT = 40
+
+# Rendering styles: "plain" for stored instructor codes, "overlay" for the
+# live preview (high error correction so the name box doesn't break scanning),
+# "label" for printed sheets (name written under the code)
+STYLES = {
+    "plain": {
+        "border": 5,
+        "error_correction": qrcode.constants.ERROR_CORRECT_L,
+        "overlay": False,
+        "label": False,
+    },
+    "overlay": {
+        "border": 2,
+        "error_correction": qrcode.constants.ERROR_CORRECT_H,
+        "overlay": True,
+        "label": False,
+    },
+    "label": {
+        "border": 4,
+        "error_correction": qrcode.constants.ERROR_CORRECT_M,
+        "overlay": False,
+        "label": True,
+    },
+}
+
+
+@lru_cache(maxsize=None)
+def get_font(size=FONT_SIZE):
+    """Load the overlay font once per process"""
+    for candidate in FONT_CANDIDATES:
+        try:
+            return ImageFont.truetype(candidate, size)
+        except OSError:
+            continue
+    return ImageFont.load_default()
+
+
+def draw_name_overlay(img, name):
+    """Draw the name in a bordered white box at the center of the QR image"""
+    draw = ImageDraw.Draw(img)
+    font = get_font()
+
+    center_x = img.width // 2
+    center_y = img.height // 2
+
+    bbox = draw.textbbox((0, 0), name, font=font)
+    text_width = bbox[2] - bbox[0]
+    text_height = bbox[3] - bbox[1]
+
+    # White background with a pink border so the text is readable over the QR
+    padding = 8
+    box = [
+        center_x - (text_width // 2) - padding,
+        center_y - (text_height // 2) - padding,
+        center_x + (text_width // 2) + padding,
+        center_y + (text_height // 2) + padding,
+    ]
+    draw.rectangle(box, fill='white', outline=OVERLAY_COLOR, width=2)
+
+    text_x = center_x - (text_width // 2)
+    text_y = center_y - (text_height // 2)
+    draw.text((text_x, text_y), name, fill=OVERLAY_COLOR, font=font)
+
+
+def draw_name_label(img, name):
+    """Return a copy of the QR image with the name centered in a strip below it"""
+    labeled = Image.new('RGB', (img.width, img.height + LABEL_HEIGHT), 'white')
+    labeled.paste(img, (0, 0))
+    draw = ImageDraw.Draw(labeled)
+    font = get_font()
+
+    # Shorten names that don't fit the width of the code
+    text = name
+    while len(text) > 1 and draw.textlength(text, font=font) > img.width - 20:
+        text = text[:-2] + '…'
+
+    bbox = draw.textbbox((0, 0), text, font=font)
+    text_x = (img.width - (bbox[2] - bbox[0])) // 2
+    text_y = img.height + (LABEL_HEIGHT - (bbox[3] - bbox[1])) // 2 - 8
+    draw.text((text_x, text_y), text, fill=OVERLAY_COLOR, font=font)
+    return labeled
+
+
+@lru_cache(maxsize=QR_CACHE_SIZE)
+def _render(url, name, style):
+    options = STYLES[style]
+
+    qr = qrcode.QRCode(
+        version=1,
+        box_size=10,
+        border=options["border"],
+        error_correction=options["error_correction"]
+    )
+    qr.add_data(url)
+    qr.make(fit=True)
+
+    img = qr.make_image(fill_color="black", back_color="white")
+
+    if options["overlay"] and name:
+        img = img.convert('RGB')
+        draw_name_overlay(img, name)
+    elif options["label"] and name:
+        img = draw_name_label(img.convert('RGB'), name)
+
+    buffered = BytesIO()
+    img.save(buffered, format="PNG")
+    return buffered.getvalue()
+
+
+def render_qr(url, name=None, style="plain"):
+    """Render a QR code PNG, reusing a cached result for the same (url, name, style).
+
+    Returns (png_bytes, render_ms, cache_hit).
+    """
+    if style not in STYLES:
+        raise ValueError(f"Unknown QR style: {style}")
+    if not (STYLES[style]["overlay"] or STYLES[style]["label"]):
+        name = None
+
+    hits_before = _render.cache_info().hits
+    start = time.perf_counter()
+    png = _render(url, name, style)
+    render_ms = (time.perf_counter() - start) * 1000
+
+    return png, render_ms, _render.cache_info().hits > hits_before
+
+
+def cache_stats():
+    """Hit/miss counters for the rendered QR cache"""
+    info = _render.cache_info()
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "size": info.currsize,
+        "max_size": info.maxsize,
+    }
+
+
+def warm():
+    """Load the font and qrcode tables up front so the first request isn't slow"""
+    get_font()
+    render_qr("warmup", name="warmup", style="overlay")
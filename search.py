@@ -0,0 +1,90 @@
+import re
+from markupsafe import Markup, escape
+from sqlalchemy.orm import joinedload
+from extensions import db
+from models import StudentMessage
+
+# Results per search page, and the deepest page served (ranked results
+# are paged by offset, so very deep pages get slow)
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE = 50
+
+# Column weights for bm25(): the message text counts most, then the
+# sender's name, then their course (instructor_id is only for scoping)
+RANK_WEIGHTS = (10.0, 4.0, 1.0, 0.0)
+
+# Markers around matched words in snippets, swapped for <mark> after escaping
+MATCH_START, MATCH_END = '\x02', '\x03'
+
+
+def match_expression(text, instructor_id=None):
+    """Turn user input into a safe FTS5 query: every word must match, the last one as a prefix.
+
+    Returns None if there is nothing to search for.
+    """
+    words = re.findall(r'\w+', text or '')[:10]
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += '*'
+    expression = f"{{message sender_name sender_course}} : ({' '.join(terms)})"
+    if instructor_id is not None:
+        expression += f' AND instructor_id : "{int(instructor_id)}"'
+    return expression
+
+
+def highlight(snippet):
+    """Escape a snippet and turn the match markers into <mark> tags"""
+    html = str(escape(snippet))
+    return Markup(html.replace(MATCH_START, '<mark>').replace(MATCH_END, '</mark>'))
+
+
+def search_messages(text, instructor_id=None, page=1, limit=SEARCH_PAGE_SIZE, approved_only=False):
+    """Best matches first, as (results, has_more).
+
+    Each result is (StudentMessage, snippet) with the sender loaded. Pass
+    instructor_id to search one inbox; leave it out to search everything.
+    approved_only leaves out messages held by moderation.
+    """
+    query = match_expression(text, instructor_id)
+    page = max(1, min(page, SEARCH_MAX_PAGE))
+    if not query:
+        return [], False
+
+    # Held messages are dropped in the query, so pages stay full
+    approved = "AND m.is_approved = 1" if approved_only else ""
+    sql = f"""
+        SELECT student_messages_fts.rowid, snippet(student_messages_fts, 0, :start, :end, '…', 16) AS snippet
+        FROM student_messages_fts
+        JOIN student_messages AS m ON m.id = student_messages_fts.rowid
+        WHERE student_messages_fts MATCH :query {approved}
+        ORDER BY bm25(student_messages_fts, {', '.join(map(str, RANK_WEIGHTS))})
+        LIMIT :limit OFFSET :offset
+    """
+    rows = db.session.execute(db.text(sql), {
+        'query': query,
+        'start': MATCH_START,
+        'end': MATCH_END,
+        'limit': limit + 1,
+        'offset': (page - 1) * limit,
+    }).all()
+
+    has_more = len(rows) > limit and page < SEARCH_MAX_PAGE
+    rows = rows[:limit]
+
+    messages = {m.id: m for m in StudentMessage.query
+                .options(joinedload(StudentMessage.student))
+                .filter(StudentMessage.id.in_([row.rowid for row in rows]))}
+    results = [(messages[row.rowid], highlight(row.snippet)) for row in rows if row.rowid in messages]
+    return results, has_more
+
+
+def search_result_json(message, snippet):
+    return {
+        'id': message.id,
+        'instructor_id': message.instructor_id,
+        'student_name': message.student.name,
+        'student_course': message.student.course,
+        'snippet': str(snippet),
+        'created_at': message.created_at.isoformat(),
+    }
@@ -0,0 +1,301 @@
+import atexit
+import glob
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from types import SimpleNamespace
+from flask import current_app
+from models import StudentMessage, manila_now
+from extensions import db
+from pubsub import get_message_broker
+
+
+class MessageWriter:
+    """Write-behind queue for student messages.
+
+    send_message puts messages on a bounded in-process queue and a background
+    thread writes them in batches, one transaction per batch. Messages waiting
+    to be written are kept per student so the sender still sees them.
+
+    The student has already been told the message was sent, so a batch that
+    can't be written is retried and, failing that, spooled to disk for a
+    later replay rather than dropped.
+    """
+
+    def __init__(self, app, max_size, batch_size, flush_interval, retries=8, retry_delay=0.5,
+                 max_retry_delay=30, spool_dir=None, replay_interval=60):
+        self.app = app
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.spool_dir = spool_dir
+        self.replay_interval = replay_interval
+        self.last_replay = None
+        self.queue = queue.Queue(maxsize=max_size)
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.stopping = threading.Event()
+        self.thread = None
+
+    def submit(self, student_id, instructor_id, text, is_approved=True):
+        """Queue a message; returns False if the queue is full"""
+        message = SimpleNamespace(
+            id=None,
+            student_id=student_id,
+            instructor_id=instructor_id,
+            message=text,
+            is_approved=is_approved,
+            created_at=manila_now()
+        )
+        self.start()
+
+        # Track it before queueing so the writer can never finish it first
+        with self.lock:
+            self.pending.setdefault(student_id, []).append(message)
+        try:
+            self.queue.put_nowait(message)
+        except queue.Full:
+            self.forget([message])
+            return False
+        return True
+
+    def pending_for(self, student_id):
+        """Messages from this student that have not been written yet, newest first"""
+        with self.lock:
+            return list(reversed(self.pending.get(student_id, [])))
+
+    def start(self):
+        # Started by the worker's first request (or submit), not at import,
+        # so forking servers don't copy a running thread
+        if self.thread is not None:
+            return
+        with self.lock:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self.run, name='message-writer', daemon=True)
+                self.thread.start()
+                atexit.register(self.stop)
+
+    def stop(self, timeout=10):
+        """Write everything still queued, then stop the writer thread"""
+        if self.thread is None:
+            return
+        self.stopping.set()
+        self.thread.join(timeout)
+
+    def run(self):
+        try:
+            self.reclaim_spool()
+            self.replay_spool()
+        except Exception:
+            self.last_replay = time.monotonic()
+            self.app.logger.exception("Failed to replay spooled messages")
+
+        # An error must not end the thread while messages are queued: the
+        # batch in hand is kept and tried again on the next pass
+        batch = []
+        # Once stopping, keep going until the queue has been fully written
+        while not (self.stopping.is_set() and self.queue.empty() and not batch):
+            try:
+                if not batch:
+                    try:
+                        batch = [self.queue.get(timeout=self.flush_interval)]
+                    except queue.Empty:
+                        pass
+
+                # Take whatever else is already waiting, up to one batch
+                while batch and len(batch) < self.batch_size:
+                    try:
+                        batch.append(self.queue.get_nowait())
+                    except queue.Empty:
+                        break
+
+                if batch:
+                    self.write_with_retry(batch)
+                    batch = []
+                if not self.stopping.is_set() and time.monotonic() - self.last_replay >= self.replay_interval:
+                    self.replay_spool()
+            except Exception:
+                self.app.logger.exception(f"Message writer failed; {len(batch)} queued messages kept for another try")
+                self.stopping.wait(self.retry_delay)
+
+    def write_with_retry(self, batch):
+        """Write a batch, retrying with doubling delays; spool it if every attempt fails"""
+        delay = self.retry_delay
+        for attempt in range(self.retries + 1):
+            error = self.write(batch)
+            if error is None:
+                self.forget(batch)
+                return
+            # Shutting down: don't hold up the exit, the spool keeps them
+            if self.stopping.is_set() or attempt == self.retries:
+                break
+            self.app.logger.warning(f"Failed to write {len(batch)} queued messages, retrying in {delay}s: {error}")
+            self.stopping.wait(delay)
+            delay = min(delay * 2, self.max_retry_delay)
+
+        path = self.spool(batch)
+        self.app.logger.error(f"Failed to write {len(batch)} queued messages, spooled to {path}: {error}")
+        self.forget(batch)
+
+    def write(self, batch):
+        """Save a batch in one transaction; returns the error, or None once committed"""
+        with self.app.app_context():
+            try:
+                rows = [
+                    StudentMessage(
+                        student_id=item.student_id,
+                        instructor_id=item.instructor_id,
+                        message=item.message,
+                        is_approved=item.is_approved,
+                        created_at=item.created_at
+                    ) for item in batch
+                ]
+                db.session.add_all(rows)
+                db.session.flush()
+
+                # Record ids before committing so readers that already see
+                # the saved row can drop the pending copy
+                for item, row in zip(batch, rows):
+                    item.id = row.id
+                db.session.commit()
+
+                broker = get_message_broker()
+                for instructor_id in {item.instructor_id for item in batch}:
+                    broker.publish(instructor_id)
+                return None
+            except Exception as e:
+                db.session.rollback()
+                # The ids were never committed and may be handed out again
+                for item in batch:
+                    item.id = None
+                return e
+            finally:
+                db.session.remove()
+
+    def spool(self, batch):
+        """Append messages to this process's spool file; returns its path"""
+        os.makedirs(self.spool_dir, exist_ok=True)
+        path = os.path.join(self.spool_dir, f"{os.getpid()}.jsonl")
+        with open(path, 'a') as f:
+            for item in batch:
+                f.write(json.dumps({
+                    'student_id': item.student_id,
+                    'instructor_id': item.instructor_id,
+                    'message': item.message,
+                    'is_approved': item.is_approved,
+                    'created_at': item.created_at.isoformat()
+                }) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        return path
+
+    def reclaim_spool(self):
+        """Put back spool files claimed by a worker that died while replaying them"""
+        for claimed in glob.glob(os.path.join(self.spool_dir, '*.jsonl.*.replay')):
+            path, pid, _ = claimed.rsplit('.', 2)
+            if int(pid) != os.getpid() and process_alive(int(pid)):
+                continue
+            # A new name, as the original may be in use again
+            try:
+                os.rename(claimed, f"{path[:-len('.jsonl')]}.{pid}.jsonl")
+            except FileNotFoundError:
+                continue
+            self.app.logger.warning(f"Recovered spooled messages left by worker {pid}: {claimed}")
+
+    def read_spool(self, path, claimed):
+        """Parse a claimed spool file; lines that can't be read are moved to <path>.bad"""
+        batch, bad = [], []
+        with open(claimed) as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    item = json.loads(line)
+                    batch.append(SimpleNamespace(
+                        id=None,
+                        student_id=item['student_id'],
+                        instructor_id=item['instructor_id'],
+                        message=item['message'],
+                        is_approved=item['is_approved'],
+                        created_at=datetime.fromisoformat(item['created_at'])
+                    ))
+                except (ValueError, KeyError, TypeError):
+                    # e.g. a line cut short by a crash mid-write
+                    bad.append(line if line.endswith('\n') else line + '\n')
+
+        if bad:
+            with open(f"{path}.bad", 'a') as f:
+                f.writelines(bad)
+            self.app.logger.error(f"Moved {len(bad)} unreadable spooled lines to {path}.bad")
+        return batch
+
+    def replay_spool(self):
+        """Write messages spooled by any worker, including ones that have since exited"""
+        self.last_replay = time.monotonic()
+        for path in glob.glob(os.path.join(self.spool_dir, '*.jsonl')):
+            # Renaming claims the file, so two workers never replay the same one
+            claimed = f"{path}.{os.getpid()}.replay"
+            try:
+                os.rename(path, claimed)
+            except FileNotFoundError:
+                continue
+
+            batch = self.read_spool(path, claimed)
+            for start in range(0, len(batch), self.batch_size):
+                chunk = batch[start:start + self.batch_size]
+                error = self.write(chunk)
+                if error is None:
+                    self.app.logger.info(f"Replayed {len(chunk)} spooled messages from {path}")
+                else:
+                    self.app.logger.error(f"Failed to replay {len(chunk)} spooled messages, kept for later: {error}")
+                    self.spool(chunk)
+            os.remove(claimed)
+
+    def forget(self, batch):
+        """Stop showing these messages as pending"""
+        with self.lock:
+            for item in batch:
+                waiting = [m for m in self.pending.get(item.student_id, []) if m is not item]
+                if waiting:
+                    self.pending[item.student_id] = waiting
+                else:
+                    self.pending.pop(item.student_id, None)
+
+
+def process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def init_message_writer(app):
+    """Create the app's MessageWriter if write-behind mode is turned on"""
+    if app.config.get('MESSAGE_WRITE_BEHIND'):
+        writer = app.extensions['message_writer'] = MessageWriter(
+            app,
+            max_size=app.config['MESSAGE_QUEUE_SIZE'],
+            batch_size=app.config['MESSAGE_BATCH_SIZE'],
+            flush_interval=app.config['MESSAGE_FLUSH_INTERVAL'],
+            retries=app.config['MESSAGE_WRITE_RETRIES'],
+            retry_delay=app.config['MESSAGE_RETRY_DELAY'],
+            max_retry_delay=app.config['MESSAGE_RETRY_MAX_DELAY'],
+            spool_dir=os.path.join(app.instance_path, app.config['MESSAGE_SPOOL_DIR']),
+            replay_interval=app.config['MESSAGE_SPOOL_REPLAY_INTERVAL']
+        )
+        # Start with the worker so spooled messages are replayed without
+        # waiting for someone to send one
+        app.before_request(writer.start)
+
+
+def get_message_writer():
+    """The current app's MessageWriter, or None when messages are written directly"""
+    return current_app.extensions.get('message_writer')
@@ -0,0 +1,154 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from flask import current_app
+from werkzeug.security import check_password_hash
+from models import make_password_hash
+from profiling import percentile
+
+# Number of recent hash timings kept for the latency percentiles
+TIMING_SAMPLES = 1000
+
+# Expired login failures are swept once this many keys are being tracked
+MAX_TRACKED_KEYS = 10000
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when too many hashes are already waiting for the worker pool"""
+
+
+class PasswordHasher:
+    """Runs password hashing on a small worker pool.
+
+    At most PASSWORD_HASH_WORKERS hashes run at once, so a wave of logins
+    can't take every CPU away from page rendering, and at most
+    PASSWORD_HASH_MAX_PENDING requests wait for a worker before new ones
+    are turned away.
+    """
+
+    def __init__(self, workers, max_pending):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+        self.workers = workers
+        self.max_pending = max_pending
+        self.slots = threading.BoundedSemaphore(max_pending)
+        self.lock = threading.Lock()
+        self.timings = deque(maxlen=TIMING_SAMPLES)
+        self.counts = {'verified': 0, 'hashed': 0, 'rejected': 0, 'in_flight': 0, 'peak_in_flight': 0}
+
+    def run(self, kind, fn, *args):
+        if not self.slots.acquire(blocking=False):
+            with self.lock:
+                self.counts['rejected'] += 1
+            raise PasswordHasherBusy()
+
+        with self.lock:
+            self.counts['in_flight'] += 1
+            self.counts['peak_in_flight'] = max(self.counts['peak_in_flight'], self.counts['in_flight'])
+        start = time.perf_counter()
+        try:
+            return self.executor.submit(fn, *args).result()
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self.slots.release()
+            with self.lock:
+                self.counts['in_flight'] -= 1
+                self.counts[kind] += 1
+                self.timings.append(elapsed_ms)
+
+    def check(self, password_hash, password):
+        return self.run('verified', check_password_hash, password_hash, password)
+
+    def hash(self, password):
+        method = current_app.config['PASSWORD_HASH_METHOD']
+        salt_length = current_app.config['PASSWORD_SALT_LENGTH']
+        return self.run('hashed', make_password_hash, password, method, salt_length)
+
+    def metrics(self):
+        """Counters plus latency percentiles (wait + hash time, in ms)"""
+        with self.lock:
+            timings = sorted(self.timings)
+            metrics = dict(self.counts, workers=self.workers, max_pending=self.max_pending)
+
+        metrics.update(
+            p50_ms=percentile(timings, 0.50),
+            p95_ms=percentile(timings, 0.95),
+            p99_ms=percentile(timings, 0.99)
+        )
+        return metrics
+
+
+class LoginThrottle:
+    """Counts failed logins per student ID and per IP in a sliding window.
+
+    Throttled attempts are refused before any hashing, so a flood of bad
+    passwords costs almost nothing. The per-IP limit is much higher because
+    a whole campus can share one address.
+    """
+
+    def __init__(self, max_failures, max_failures_per_ip, window):
+        self.limits = {'student': max_failures, 'ip': max_failures_per_ip}
+        self.window = window
+        self.failures = {}
+        self.lock = threading.Lock()
+        self.counts = {'failed': 0, 'throttled': 0}
+
+    def _recent(self, key, now):
+        attempts = self.failures.get(key)
+        while attempts and attempts[0] <= now - self.window:
+            attempts.popleft()
+        if attempts is not None and not attempts:
+            del self.failures[key]
+            return None
+        return attempts
+
+    def retry_after(self, student_id, ip):
+        """Seconds until another attempt is allowed, or 0 if it is allowed now"""
+        now = time.monotonic()
+        wait = 0
+        with self.lock:
+            for key in (('student', student_id), ('ip', ip)):
+                attempts = self._recent(key, now)
+                if attempts and len(attempts) >= self.limits[key[0]]:
+                    wait = max(wait, attempts[0] + self.window - now)
+            if wait:
+                self.counts['throttled'] += 1
+        return wait
+
+    def failed(self, student_id, ip):
+        now = time.monotonic()
+        with self.lock:
+            self.counts['failed'] += 1
+            if len(self.failures) >= MAX_TRACKED_KEYS:
+                for key in list(self.failures):
+                    self._recent(key, now)
+            for key in (('student', student_id), ('ip', ip)):
+                self.failures.setdefault(key, deque()).append(now)
+
+    def succeeded(self, student_id):
+        with self.lock:
+            self.failures.pop(('student', student_id), None)
+
+    def metrics(self):
+        with self.lock:
+            return dict(self.counts, tracked_keys=len(self.failures))
+
+
+def init_passwords(app):
+    app.extensions['password_hasher'] = PasswordHasher(
+        workers=app.config['PASSWORD_HASH_WORKERS'],
+        max_pending=app.config['PASSWORD_HASH_MAX_PENDING']
+    )
+    app.extensions['login_throttle'] = LoginThrottle(
+        max_failures=app.config['LOGIN_MAX_FAILURES'],
+        max_failures_per_ip=app.config['LOGIN_MAX_FAILURES_PER_IP'],
+        window=app.config['LOGIN_FAILURE_WINDOW']
+    )
+
+
+def get_password_hasher():
+    return current_app.extensions['password_hasher']
+
+
+def get_login_throttle():
+    return current_app.extensions['login_throttle']
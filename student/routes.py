@@ -1,6 +1,11 @@
-from flask import Blueprint, render_template, redirect, url_for, flash, request, session
+from flask import Blueprint, render_template, redirect, url_for, flash, request, session, make_response
 from models import Student, Instructor, StudentMessage, OfficialStudent
-from extensions import db
+from extensions import db, cache
+from pubsub import get_message_broker
+from moderation import get_moderator
+from student.message_queue import init_message_writer, get_message_writer
+from student.passwords import get_password_hasher, get_login_throttle, PasswordHasherBusy
+import math
 from functools import wraps
 from flask import abort
 
@@ -8,6 +13,71 @@ student_bp = Blueprint('student', __name__,
                        template_folder='templates',
                        static_folder='static')
 
+@student_bp.record_once
+def setup_message_writer(state):
+    init_message_writer(state.app)
+
+
+def busy_response(template):
+    """Ask the student to retry when the password workers are all busy"""
+    flash('Lots of students are logging in right now. Please try again in a moment. 💕', 'error')
+    response = make_response(render_template(template), 503)
+    response.headers['Retry-After'] = '5'
+    return response
+
+
+def pending_messages(student_id):
+    """Messages this student sent that the write-behind queue hasn't saved yet"""
+    writer = get_message_writer()
+    if not writer:
+        return []
+    
+    pending = writer.pending_for(student_id)
+    if pending:
+        instructors = {i.id: i for i in Instructor.query.filter(
+            Instructor.id.in_({m.instructor_id for m in pending})
+        )}
+        for message in pending:
+            message.instructor = instructors.get(message.instructor_id)
+    return [m for m in pending if m.instructor]
+
+
+def with_pending(student_id, query):
+    """Run a query for this student's saved messages and put queued ones in front"""
+    # Look at the queue first: anything saved in between shows up in the
+    # query results and is dropped from the pending list by id
+    pending = pending_messages(student_id)
+    saved = query.all()
+    saved_ids = {m.id for m in saved}
+    pending = [m for m in pending if m.id not in saved_ids]
+    return pending + saved, len(pending)
+
+
+def sent_messages_query(student_id):
+    """Messages this student has sent, newest first"""
+    return StudentMessage.query.filter_by(student_id=student_id)\
+        .join(Instructor)\
+        .order_by(StudentMessage.created_at.desc())
+
+
+def instructor_grid():
+    """Rendered instructor cards, shared by every student.
+
+    Cached under the "instructors" version, which admin bumps whenever an
+    instructor is added or deleted.
+    """
+    key = f"instructor_grid:{cache.get_version('instructors')}"
+    
+    def build():
+        instructors = Instructor.query.all()
+        return {
+            'count': len(instructors),
+            'html': render_template('instructor_grid.html', instructors=instructors)
+        }
+    
+    return cache.get_or_set(key, build)
+
+
 # Login required decorator
 def student_login_required(f):
     @wraps(f)
@@ -58,7 +128,10 @@ def register():
             year=year,
             email=email
         )
-        new_student.set_password(password)
+        try:
+            new_student.password_hash = get_password_hasher().hash(password)
+        except PasswordHasherBusy:
+            return busy_response('register.html')
         
         db.session.add(new_student)
         db.session.commit()
@@ -76,14 +149,36 @@ def login():
         student_id = request.form['student_id']
         password = request.form['password']
         
+        # Refuse throttled attempts before doing any hashing work
+        throttle = get_login_throttle()
+        retry_after = throttle.retry_after(student_id, request.remote_addr)
+        if retry_after:
+            flash(f'Too many failed logins. Please try again in {math.ceil(retry_after / 60)} minute(s).', 'error')
+            response = make_response(render_template('login.html'), 429)
+            response.headers['Retry-After'] = str(math.ceil(retry_after))
+            return response
+        
         student = Student.query.filter_by(student_id=student_id).first()
+        hasher = get_password_hasher()
         
-        if student and student.check_password(password):
+        try:
+            valid = student is not None and hasher.check(student.password_hash, password)
+            
+            # Upgrade the stored hash if the configured parameters changed
+            if valid and student.needs_rehash():
+                student.password_hash = hasher.hash(password)
+                db.session.commit()
+        except PasswordHasherBusy:
+            return busy_response('login.html')
+        
+        if valid:
+            throttle.succeeded(student_id)
             session['student_id'] = student.id
             session['student_name'] = student.name
             flash(f'Welcome back, {student.name}!', 'success')
             return redirect(url_for('student.dashboard'))
         else:
+            throttle.failed(student_id, request.remote_addr)
             flash('Invalid Student ID or password!', 'error')
     
     return render_template('login.html')
@@ -104,19 +199,14 @@ def dashboard():
     student_id = session['student_id']
     student = Student.query.get(student_id)
     
-    # Get ALL instructors
-    instructors = Instructor.query.all()
-    
-    # Get messages sent by this student
-    my_messages = StudentMessage.query.filter_by(student_id=student_id)\
-        .join(Instructor)\
-        .order_by(StudentMessage.created_at.desc())\
-        .all()
+    # Get messages sent by this student (including any still being saved)
+    my_messages, pending_count = with_pending(student_id, sent_messages_query(student_id))
     
     return render_template('student_dashboard.html', 
                          student=student, 
-                         instructors=instructors,
-                         my_messages=my_messages)
+                         instructor_grid=instructor_grid(),
+                         my_messages=my_messages,
+                         sent_count=student.sent_count + pending_count)
 
 
 @student_bp.route('/instructor/<int:instructor_id>')
@@ -125,11 +215,13 @@ def view_instructor(instructor_id):
     instructor = Instructor.query.get_or_404(instructor_id)
     student_id = session['student_id']
     
-    # Check if student already sent a message to this instructor
+    # Check if student already sent a message to this instructor, counting
+    # one still on the write-behind queue (checked first, as in with_pending)
+    queued = next((m for m in pending_messages(student_id) if m.instructor_id == instructor_id), None)
     existing_message = StudentMessage.query.filter_by(
         student_id=student_id,
         instructor_id=instructor_id
-    ).first()
+    ).first() or queued
     
     return render_template('view_instructor.html', 
                          instructor=instructor, 
@@ -148,16 +240,33 @@ def send_message(instructor_id):
         flash('Please enter a message!', 'error')
         return redirect(url_for('student.view_instructor', instructor_id=instructor_id))
     
-    # Create new message (allow multiple messages)
-    new_message = StudentMessage(
-        student_id=student_id,
-        instructor_id=instructor_id,
-        message=message_text,
-        is_approved=True
-    )
+    # Messages with a listed word are saved unapproved for the admin to review
+    is_approved = get_moderator().allows(message_text)
     
-    db.session.add(new_message)
-    db.session.commit()
+    writer = get_message_writer()
+    if writer:
+        # Write-behind mode: queue it and let the background writer save it
+        if not writer.submit(student_id, instructor_id, message_text, is_approved=is_approved):
+            flash('So many Valentines are being sent right now! Please try again in a moment. 💕', 'error')
+            response = make_response(render_template('view_instructor.html',
+                                                     instructor=instructor,
+                                                     existing_message=None), 503)
+            response.headers['Retry-After'] = '5'
+            return response
+    else:
+        # Create new message (allow multiple messages)
+        new_message = StudentMessage(
+            student_id=student_id,
+            instructor_id=instructor_id,
+            message=message_text,
+            is_approved=is_approved
+        )
+        
+        db.session.add(new_message)
+        db.session.commit()
+        
+        # Let open inbox dashboards know there is something new
+        get_message_broker().publish(instructor_id)
     
     flash('Your Valentine message has been sent to instructor! 💖', 'success')
     return redirect(url_for('student.view_instructor', instructor_id=instructor_id))
@@ -168,10 +277,7 @@ def send_message(instructor_id):
 @student_login_required
 def my_messages():
     student_id = session['student_id']
-    messages = StudentMessage.query.filter_by(student_id=student_id)\
-        .join(Instructor)\
-        .order_by(StudentMessage.created_at.desc())\
-        .all()
+    messages, _ = with_pending(student_id, sent_messages_query(student_id))
     
     return render_template('my_messages.html', messages=messages)
 
@@ -182,8 +288,9 @@ def profile():
     student_id = session['student_id']
     student = Student.query.get(student_id)
     
-    # Count messages
-    message_count = StudentMessage.query.filter_by(student_id=student_id).count()
-    approved_count = StudentMessage.query.filter_by(student_id=student_id, is_approved=True).count()
+    # Counters are maintained on the student row as messages are written
+    pending = [m for m in pending_messages(student_id) if m.id is None]
+    message_count = student.sent_count + len(pending)
+    approved_count = student.approved_sent_count + sum(1 for m in pending if m.is_approved)
     
     return render_template('profile.html', student=student, message_count=message_count, approved_count=approved_count)
\ No newline at end of file
@@ -0,0 +1,63 @@
+function updateCharCount(textarea) {
+    const count = textarea.value.length;
+    const charCountSpan = document.getElementById('charCount');
+    const container = document.getElementById('charCountContainer');
+
+    // Update count
+    charCountSpan.textContent = count.toLocaleString(); // Adds commas for thousands
+
+    // Visual feedback for approaching limit
+    if (count > 9500) {
+        container.classList.add('warning');
+        container.classList.remove('limit');
+    } else if (count > 9900) {
+        container.classList.remove('warning');
+        container.classList.add('limit');
+    } else {
+        container.classList.remove('warning', 'limit');
+    }
+
+    // Optional: Show remaining characters
+    const remaining = 10000 - count;
+    if (remaining <= 100) {
+        // Can add additional warning behavior here
+        console.log(`Only ${remaining} characters remaining`);
+    }
+}
+
+// Form submission handling
+document.getElementById('messageForm')?.addEventListener('submit', function(e) {
+    const message = document.getElementById('message');
+    const count = message.value.length;
+
+    // Double-check on submit (though maxlength prevents going over)
+    if (count > 10000) {
+        e.preventDefault();
+        alert('Message exceeds the maximum length of 10,000 characters. Please shorten your message.');
+        return;
+    }
+
+    const sendBtn = document.getElementById('sendBtn');
+    sendBtn.disabled = true;
+    sendBtn.innerHTML = '<span>⏳</span> Sending...';
+});
+
+// Auto-hide flash messages after 5 seconds
+setTimeout(function() {
+    const flashMessages = document.querySelectorAll('.flash-message');
+    flashMessages.forEach(function(message) {
+        message.style.transition = 'opacity 0.5s ease';
+        message.style.opacity = '0';
+        setTimeout(function() {
+            message.remove();
+        }, 500);
+    });
+}, 5000);
+
+// Initialize character count on page load
+window.addEventListener('load', function() {
+    const textarea = document.getElementById('message');
+    if (textarea) {
+        updateCharCount(textarea);
+    }
+});
@@ -0,0 +1,28 @@
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """An app on a throwaway database with the schema created"""
+    monkeypatch.setenv('FLASK_SQLALCHEMY_DATABASE_URI', f'sqlite:///{tmp_path / "valentine.db"}')
+    monkeypatch.setenv('FLASK_SQLALCHEMY_BINDS', json.dumps({'archive': f'sqlite:///{tmp_path / "archive.db"}'}))
+    monkeypatch.setenv('FLASK_MODERATION_WORDLIST', str(tmp_path / 'moderation.txt'))
+    monkeypatch.setenv('FLASK_ASSETS_BUILD_ON_START', 'false')
+
+    from app import create_app, init_schema
+    from extensions import db
+
+    app = create_app()
+    app.config['TESTING'] = True
+    with app.app_context():
+        init_schema()
+        yield app
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
@@ -0,0 +1,58 @@
+"""Query plans of the hot-path queries.
+
+The queries are captured from the real functions as they run, then put
+through EXPLAIN QUERY PLAN, so a change to a route's query or to the
+indexes that makes SQLite scan a table fails here.
+"""
+from datetime import datetime
+
+import pytest
+from sqlalchemy import event
+
+from admin.routes import roster_count, roster_page
+from extensions import db
+from instructor.routes import inbox_page, messages_after
+from student.routes import sent_messages_query
+
+
+def query_plans(call):
+    """Run call() and return the EXPLAIN QUERY PLAN details of each statement it ran"""
+    statements = []
+
+    def capture(connection, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(db.engine, 'before_cursor_execute', capture)
+    try:
+        call()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', capture)
+
+    connection = db.session.connection()
+    return [
+        [row.detail for row in connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters)]
+        for statement, parameters in statements
+    ]
+
+
+HOT_PATHS = {
+    'inbox first page': (lambda: inbox_page(1), 'INDEX ix_student_messages_instructor_created'),
+    'inbox older page': (lambda: inbox_page(1, before=(datetime(2026, 2, 14), 500)),
+                         'INDEX ix_student_messages_instructor_created'),
+    'live inbox': (lambda: messages_after(1, 500), 'INDEX ix_student_messages_instructor_id'),
+    'student dashboard': (lambda: sent_messages_query(1).all(), 'INDEX ix_student_messages_student_created'),
+    'roster page': (lambda: roster_page(after=50), 'INTEGER PRIMARY KEY'),
+    'roster search': (lambda: roster_page('dela'), 'INDEX ix_official_students_last_name_nocase'),
+    'roster search count': (lambda: roster_count('dela'), 'INDEX ix_official_students_student_id_nocase'),
+}
+
+
+@pytest.mark.parametrize('name', HOT_PATHS)
+def test_hot_path_uses_index(app, name):
+    call, expected = HOT_PATHS[name]
+    plans = query_plans(call)
+
+    assert len(plans) == 1
+    plan = plans[0]
+    assert any(f'USING {expected}' in detail for detail in plan), plan
+    assert not [detail for detail in plan if detail.startswith('SCAN')], plan